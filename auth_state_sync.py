@@ -90,9 +90,9 @@ class AuthStateSync:
     def _check_backend_auth(self, brokerage_key: str) -> Optional[Dict[str, Any]]:
         """Check backend authentication storage."""
         try:
-            from gmail_auth_service import gmail_auth_service
+            from gmail_auth_service import get_gmail_auth_service
             
-            credentials = gmail_auth_service.get_credentials(brokerage_key)
+            credentials = get_gmail_auth_service().get_credentials(brokerage_key)
             if credentials:
                 return {
                     'email': credentials.email,
@@ -289,8 +289,8 @@ class AuthStateSync:
             
             # Clear backend storage
             try:
-                from gmail_auth_service import gmail_auth_service
-                gmail_auth_service.revoke_credentials(brokerage_key)
+                from gmail_auth_service import get_gmail_auth_service
+                get_gmail_auth_service().revoke_credentials(brokerage_key)
                 result['cleared_sources'].append('backend_gmail_service')
             except Exception as e:
                 result['errors'].append(f"Backend clear error: {str(e)}")
@@ -10,6 +10,10 @@ logger = logging.getLogger(__name__)
 class EnrichmentSource(ABC):
     """Abstract base class for enrichment sources."""
     
+    # Set to True when enrich() performs its own applicability check and returns
+    # non-applicable rows unchanged; EnrichmentManager then skips is_applicable().
+    checks_applicability_in_enrich = False
+    
     def __init__(self, config: Dict[str, Any]):
         """Initialize enrichment source with configuration.
         
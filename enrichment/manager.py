@@ -69,7 +69,7 @@ class EnrichmentManager:
         
         for source in self.sources:
             try:
-                if source.is_applicable(enriched_row):
+                if source.checks_applicability_in_enrich or source.is_applicable(enriched_row):
                     enriched_row = source.enrich(enriched_row)
                     
             except Exception as e:
@@ -83,6 +83,11 @@ class EnrichmentManager:
     def enrich_rows(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Enrich multiple data rows.
         
+        Sources that provide enrich_batch() (e.g. the tracking API) process all
+        rows at once so their network calls can run concurrently. Other sources,
+        and batch sources whose batch call fails, are applied row by row so a
+        failure only marks the rows it affects.
+        
         Args:
             rows: List of original data row dictionaries
             
@@ -95,22 +100,33 @@ class EnrichmentManager:
             
         logger.info(f"Enriching {len(rows)} rows with {len(self.sources)} sources")
         
-        enriched_rows = []
-        for i, row in enumerate(rows):
-            try:
-                enriched_row = self.enrich_row(row)
-                enriched_rows.append(enriched_row)
+        enriched_rows = [row.copy() for row in rows]
+        
+        for source in self.sources:
+            source_type = source.__class__.__name__
+            enrich_batch = getattr(source, 'enrich_batch', None)
+            
+            if enrich_batch is not None:
+                try:
+                    enriched_rows = enrich_batch(enriched_rows)
+                    logger.info(f"Enriched {len(enriched_rows)}/{len(rows)} rows with {source_type}")
+                    continue
+                except Exception as e:
+                    logger.error(f"Error in {source_type} batch enrichment, falling back to per-row: {e}")
+            
+            for i, enriched_row in enumerate(enriched_rows):
+                try:
+                    if source.checks_applicability_in_enrich or source.is_applicable(enriched_row):
+                        enriched_rows[i] = source.enrich(enriched_row)
+                except Exception as e:
+                    logger.error(f"Failed to enrich row {i} with {source_type}: {e}")
+                    # Same keys as enrich_row plus the row-level key read by callers
+                    enriched_row[f'{source_type}_error'] = str(e)
+                    enriched_row['enrichment_error'] = str(e)
                 
                 if (i + 1) % 100 == 0:  # Log progress every 100 rows
-                    logger.info(f"Enriched {i + 1}/{len(rows)} rows")
+                    logger.info(f"Enriched {i + 1}/{len(rows)} rows with {source_type}")
                     
-            except Exception as e:
-                logger.error(f"Failed to enrich row {i}: {e}")
-                # Include original row with error information
-                error_row = row.copy()
-                error_row['enrichment_error'] = str(e)
-                enriched_rows.append(error_row)
-                
         logger.info(f"Successfully enriched {len(enriched_rows)} rows")
         return enriched_rows
     
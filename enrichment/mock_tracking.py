@@ -108,7 +108,7 @@ class MockTrackingEnrichmentSource(EnrichmentSource):
                     'enrichment_timestamp': datetime.now().isoformat()
                 })
                 
-                logger.debug(f"Enriched {carrier} {pro} with {len(tracking_events)} tracking events")
+                logger.debug("Enriched %s %s with %d tracking events", carrier, pro, len(tracking_events))
             else:
                 # Add basic enrichment fields
                 enriched_row.update({
@@ -5,15 +5,89 @@ Provides real-time carrier tracking data via browser automation API
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
+import sys
+import threading
 import time
 import json
-from typing import Dict, Any, Optional, List
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
 from .base import EnrichmentSource
 
+# Prefer orjson for response parsing when available
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 logger = logging.getLogger(__name__)
 
+# ASCII-only uppercase table for carrier names/SCAC codes (cheaper than str.upper)
+_UPPER_TABLE = str.maketrans('abcdefghijklmnopqrstuvwxyz', 'ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+
+# Tracking columns added to every enriched row, overwritten when data is found
+_TRACKING_PLACEHOLDERS = {
+    'tracking_status': None,
+    'tracking_location': None,
+    'tracking_date': None
+}
+
+# Sentinel distinguishing a cache miss from a cached None
+_MISSING = object()
+
+
+@lru_cache(maxsize=1)
+def _resolve_auth_header() -> Dict[str, str]:
+    """
+    Resolve tracking API auth headers from the tracking_api section of Streamlit secrets.
+    
+    Prefers tracking_api.bearer_token and falls back to tracking_api.api_key.
+    Successful results are cached for the process and shared across enricher
+    instances; failures raise and are retried on the next call.
+    
+    Returns:
+        Headers dictionary including the Authorization header
+    """
+    try:
+        import streamlit as st
+        
+        if not hasattr(st, 'secrets'):
+            raise Exception("Streamlit secrets not available - check cloud deployment configuration")
+        
+        if not hasattr(st.secrets, 'tracking_api'):
+            try:
+                available_sections = list(st.secrets.keys())
+            except Exception:
+                available_sections = []
+            raise Exception(f"Missing [tracking_api] section. Available sections: {available_sections}")
+        
+        tracking_secrets = st.secrets.tracking_api
+        
+        for key_name in ('bearer_token', 'api_key'):
+            token = str(getattr(tracking_secrets, key_name, '') or '').strip()
+            if token:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Tracking API Authorization header resolved from tracking_api.%s", key_name)
+                return {
+                    'Authorization': f'Bearer {token}',
+                    'Content-Type': 'application/json',
+                    'User-Agent': 'FF2API-TrackingEnrichment/1.0'
+                }
+        
+        available_keys = [k for k in ('bearer_token', 'api_key') if hasattr(tracking_secrets, k)]
+        raise Exception(f"No valid credentials in tracking_api section. Available keys: {available_keys}")
+            
+    except Exception as e:
+        logger.error("Tracking API authentication failed: %s: %s", type(e).__name__, e)
+        raise Exception(f"Tracking API authentication error: {e}")
+
+
 
 class TrackingAPIEnricher(EnrichmentSource):
     """
@@ -21,6 +95,21 @@ class TrackingAPIEnricher(EnrichmentSource):
     Automatically inherits authentication from existing FF2API configuration.
     """
     
+    # enrich() extracts PRO/carrier itself and skips rows without them
+    checks_applicability_in_enrich = True
+    
+    # Seconds to remember negative results: 404s vs auth failures/exhausted retries
+    NOT_FOUND_CACHE_TTL = 300
+    ERROR_CACHE_TTL = 30
+    
+    # PRO/carrier fields populated by the workflow from FF2API load details (highest priority)
+    FF2API_PRO_FIELDS = ('ff2api_pro_number', 'PRO')
+    FF2API_CARRIER_FIELDS = ('ff2api_carrier_name', 'carrier')
+    
+    # Fallback CSV fields, checked after the configured pro_column/carrier_column
+    CSV_PRO_FIELDS = ('Carrier Pro#', 'PRO', 'pro_number', 'ProNumber', 'tracking_number')
+    CSV_CARRIER_FIELDS = ('Carrier Name', 'carrier', 'carrier_name', 'scac_code')
+    
     def __init__(self, config: Dict[str, Any]):
         """
         Initialize tracking API enrichment with hardcoded authentication from secrets.
@@ -37,193 +126,80 @@ class TrackingAPIEnricher(EnrichmentSource):
         self.pro_column = config.get('pro_column', 'PRO')
         self.carrier_column = config.get('carrier_column', 'carrier')
         
+        # Add None tracking_* placeholders to rows without tracking data; disable
+        # to return those rows as-is and skip the per-row copy
+        self.add_tracking_placeholders = config.get('add_tracking_placeholders', True)
+        
+        # Field priority chains used by _extract_row_data (deduplicated, order preserved)
+        self._pro_field_chain = tuple(dict.fromkeys(
+            self.FF2API_PRO_FIELDS + (self.pro_column,) + self.CSV_PRO_FIELDS
+        ))
+        self._carrier_field_chain = tuple(dict.fromkeys(
+            self.FF2API_CARRIER_FIELDS + (self.carrier_column,) + self.CSV_CARRIER_FIELDS
+        ))
+        
         # Tracking endpoint
         self.tracking_base_url = self._derive_tracking_endpoint()
+        self._pro_url_prefix = f"{self.tracking_base_url}/pro-number/"
+        self._tracking_params = {
+            'brokerageKey': 'eshipping',  # Always use eshipping for tracking API
+            'browserTask': 'ESTES'  # Always use ESTES regardless of carrier
+        }
         
         # Standard settings
         self.timeout = config.get('timeout', 30)
         self.retry_count = config.get('max_retries', 3)
         self.retry_delay = config.get('retry_delay', 1)
-        
-        # Initialize session for persistent connection
-        self.session = requests.Session()
+        self.max_workers = config.get('max_workers', 16)
+        
+        # Circuit breaker: fail fast after repeated auth/5xx/exhausted-retry failures
+        self._cb_threshold = config.get('circuit_breaker_threshold', 10)
+        self._cb_cooldown = config.get('circuit_breaker_cooldown', 60.0)
+        self._cb_failures = 0
+        self._cb_open_until = 0.0
+        self._cb_lock = threading.Lock()
+        
+        # Initialize session for persistent connection; the pool is sized for
+        # enrich_batch workers and retries are handled by urllib3
+        self.session = self._create_session(config)
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=config.get('pool_maxsize', max(self.max_workers, 10)),
+            max_retries=self._build_retry()
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         
         # Use hardcoded authentication from secrets (managed separately)
         self._setup_hardcoded_auth()
         
-        # Cache for API results to avoid duplicate calls
-        self._tracking_cache = {}
+        # Bounded LRU cache of extracted tracking fields to avoid duplicate calls
+        self._tracking_cache: OrderedDict = OrderedDict()
+        
+        # Expiry timestamps for failed lookups, kept apart so 404s never evict hits
+        self._negative_cache: Dict[Tuple[str, str], float] = {}
+        self._cache_max = config.get('tracking_cache_max', 10000)
+        self._cache_lock = threading.Lock()
         
-        logger.info(f"Tracking API initialized for brokerage: {self.brokerage_key}")
-        logger.info(f"Tracking endpoint: {self.tracking_base_url}")
-        logger.info(f"Column mapping - PRO: {self.pro_column}, Carrier: {self.carrier_column}")
+        # Futures for lookups currently in flight, so concurrent callers share one request
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        
+        # Result of validate_config(), probed once per instance
+        self._config_validated: Optional[bool] = None
+        
+        logger.info("Tracking API initialized for brokerage: %s", self.brokerage_key)
+        logger.info("Tracking endpoint: %s", self.tracking_base_url)
+        logger.info("Column mapping - PRO: %s, Carrier: %s", self.pro_column, self.carrier_column)
         logger.info("Using hardcoded authentication for tracking API")
     
     def _setup_hardcoded_auth(self):
         """
-        Setup authentication with comprehensive debugging for tracking_api secrets.
-        """
-        # COMPREHENSIVE DEBUG LOGGING
-        logger.info("🔍 DEBUG: Starting Tracking API authentication analysis")
+        Setup authentication from the tracking_api section of Streamlit secrets.
         
-        try:
-            import streamlit as st
-            
-            # Step 1: Test Streamlit import and basic access
-            logger.info(f"🔍 DEBUG: Streamlit module available: {st is not None}")
-            logger.info(f"🔍 DEBUG: hasattr(st, 'secrets'): {hasattr(st, 'secrets')}")
-            
-            if not hasattr(st, 'secrets'):
-                logger.error("❌ DEBUG: st.secrets attribute not available")
-                raise Exception("DEBUG: Streamlit secrets not available - check cloud deployment configuration")
-            
-            # Step 2: Test secrets object accessibility
-            try:
-                secrets_obj = st.secrets
-                logger.info(f"🔍 DEBUG: st.secrets object type: {type(secrets_obj)}")
-                logger.info(f"🔍 DEBUG: st.secrets object exists: {secrets_obj is not None}")
-            except Exception as secrets_error:
-                logger.error(f"❌ DEBUG: Error accessing st.secrets object: {secrets_error}")
-                raise Exception(f"DEBUG: Cannot access st.secrets object: {secrets_error}")
-            
-            # Step 3: Test secrets conversion to dict
-            try:
-                secrets_dict = dict(st.secrets)
-                available_sections = list(secrets_dict.keys())
-                logger.info(f"🔍 DEBUG: Available secrets sections: {available_sections}")
-                logger.info(f"🔍 DEBUG: Total sections found: {len(available_sections)}")
-            except Exception as dict_error:
-                logger.error(f"❌ DEBUG: Error converting secrets to dict: {dict_error}")
-                available_sections = ["DICT_CONVERSION_FAILED"]
-            
-            # Step 4: Test tracking_api section access
-            logger.info("🔍 DEBUG: Testing tracking_api section access...")
-            
-            # Method 1: Dictionary membership test
-            try:
-                tracking_api_in_dict = 'tracking_api' in st.secrets
-                logger.info(f"🔍 DEBUG: 'tracking_api' in st.secrets (dict method): {tracking_api_in_dict}")
-            except Exception as dict_test_error:
-                logger.error(f"❌ DEBUG: Dictionary membership test failed: {dict_test_error}")
-                tracking_api_in_dict = False
-            
-            # Method 2: hasattr test
-            try:
-                tracking_api_hasattr = hasattr(st.secrets, 'tracking_api')
-                logger.info(f"🔍 DEBUG: hasattr(st.secrets, 'tracking_api'): {tracking_api_hasattr}")
-            except Exception as hasattr_error:
-                logger.error(f"❌ DEBUG: hasattr test failed: {hasattr_error}")
-                tracking_api_hasattr = False
-            
-            # Step 5: If section missing, provide detailed diagnosis
-            if not tracking_api_in_dict and not tracking_api_hasattr:
-                logger.error(f"❌ DEBUG: tracking_api section not found")
-                logger.error(f"❌ DEBUG: Available sections: {available_sections}")
-                
-                # Check for similar section names
-                similar_sections = [s for s in available_sections if 'tracking' in s.lower() or 'api' in s.lower()]
-                if similar_sections:
-                    logger.error(f"❌ DEBUG: Similar sections found: {similar_sections}")
-                
-                raise Exception(f"DEBUG: Missing [tracking_api] section. Available sections: {available_sections}")
-            
-            # Step 6: Access tracking_api section
-            logger.info("🔍 DEBUG: Accessing tracking_api section...")
-            try:
-                tracking_secrets = st.secrets.tracking_api
-                logger.info(f"🔍 DEBUG: tracking_secrets object type: {type(tracking_secrets)}")
-                logger.info(f"🔍 DEBUG: tracking_secrets object exists: {tracking_secrets is not None}")
-            except Exception as section_error:
-                logger.error(f"❌ DEBUG: Error accessing tracking_api section: {section_error}")
-                raise Exception(f"DEBUG: Cannot access tracking_api section: {section_error}")
-            
-            # Step 7: Test bearer_token access
-            logger.info("🔍 DEBUG: Testing bearer_token access...")
-            try:
-                has_bearer_token = hasattr(tracking_secrets, 'bearer_token')
-                logger.info(f"🔍 DEBUG: hasattr(tracking_secrets, 'bearer_token'): {has_bearer_token}")
-                
-                if has_bearer_token:
-                    bearer_token_raw = tracking_secrets.bearer_token
-                    logger.info(f"🔍 DEBUG: bearer_token raw type: {type(bearer_token_raw)}")
-                    logger.info(f"🔍 DEBUG: bearer_token raw value exists: {bearer_token_raw is not None}")
-                    logger.info(f"🔍 DEBUG: bearer_token raw length: {len(str(bearer_token_raw)) if bearer_token_raw else 0}")
-                    
-                    if bearer_token_raw:
-                        bearer_token = str(bearer_token_raw).strip()
-                        logger.info(f"🔍 DEBUG: bearer_token after processing length: {len(bearer_token)}")
-                        logger.info(f"🔍 DEBUG: bearer_token preview: {bearer_token[:10]}...{bearer_token[-4:] if len(bearer_token) > 14 else bearer_token}")
-                        
-                        if bearer_token:
-                            self.session.headers.update({
-                                'Authorization': f'Bearer {bearer_token}',
-                                'Content-Type': 'application/json',
-                                'User-Agent': 'FF2API-TrackingEnrichment/1.0'
-                            })
-                            logger.info("✅ DEBUG: Successfully set session Authorization header with bearer_token")
-                            logger.info(f"🔍 DEBUG: Session headers now: {dict(self.session.headers)}")
-                            return
-                        else:
-                            logger.error("❌ DEBUG: bearer_token is empty after processing")
-                    else:
-                        logger.error("❌ DEBUG: bearer_token raw value is None/empty")
-            except Exception as bearer_error:
-                logger.error(f"❌ DEBUG: Error accessing bearer_token: {bearer_error}")
-            
-            # Step 8: Test api_key access
-            logger.info("🔍 DEBUG: Testing api_key access...")
-            try:
-                has_api_key = hasattr(tracking_secrets, 'api_key')
-                logger.info(f"🔍 DEBUG: hasattr(tracking_secrets, 'api_key'): {has_api_key}")
-                
-                if has_api_key:
-                    api_key_raw = tracking_secrets.api_key
-                    logger.info(f"🔍 DEBUG: api_key raw type: {type(api_key_raw)}")
-                    logger.info(f"🔍 DEBUG: api_key raw value exists: {api_key_raw is not None}")
-                    logger.info(f"🔍 DEBUG: api_key raw length: {len(str(api_key_raw)) if api_key_raw else 0}")
-                    
-                    if api_key_raw:
-                        api_key = str(api_key_raw).strip()
-                        logger.info(f"🔍 DEBUG: api_key after processing length: {len(api_key)}")
-                        logger.info(f"🔍 DEBUG: api_key preview: {api_key[:10]}...{api_key[-4:] if len(api_key) > 14 else api_key}")
-                        
-                        if api_key:
-                            self.session.headers.update({
-                                'Authorization': f'Bearer {api_key}',
-                                'Content-Type': 'application/json',
-                                'User-Agent': 'FF2API-TrackingEnrichment/1.0'
-                            })
-                            logger.info("✅ DEBUG: Successfully set session Authorization header with api_key")
-                            logger.info(f"🔍 DEBUG: Session headers now: {dict(self.session.headers)}")
-                            return
-                        else:
-                            logger.error("❌ DEBUG: api_key is empty after processing")
-                    else:
-                        logger.error("❌ DEBUG: api_key raw value is None/empty")
-            except Exception as api_key_error:
-                logger.error(f"❌ DEBUG: Error accessing api_key: {api_key_error}")
-            
-            # Step 9: Final failure analysis
-            logger.error("❌ DEBUG: No valid authentication credentials found")
-            available_keys = []
-            try:
-                if hasattr(tracking_secrets, 'bearer_token'):
-                    available_keys.append('bearer_token')
-                if hasattr(tracking_secrets, 'api_key'):
-                    available_keys.append('api_key')
-                logger.error(f"❌ DEBUG: Available keys in tracking_api section: {available_keys}")
-            except:
-                logger.error("❌ DEBUG: Cannot enumerate keys in tracking_api section")
-            
-            raise Exception(f"DEBUG: No valid credentials in tracking_api section. Available keys: {available_keys}")
-                
-        except Exception as e:
-            logger.error(f"❌ DEBUG: Tracking API authentication failed with: {type(e).__name__}: {e}")
-            logger.error("❌ DEBUG: This detailed error information should help identify the root cause")
-            raise Exception(f"Tracking API authentication debug error: {e}")
+        The resolved headers are shared by all enricher instances in the process.
+        """
+        self.session.headers.update(_resolve_auth_header())
     
-    # Debug version with comprehensive logging - default headers method removed for debugging
-
     def _derive_tracking_endpoint(self) -> str:
         """
         Auto-derive tracking API endpoint from existing FF2API base URL.
@@ -240,6 +216,33 @@ class TrackingAPIEnricher(EnrichmentSource):
         Check if tracking API configuration is valid.
         Also performs a test call to verify tracking API access.
         
+        The result is cached on the instance so the live probe only runs once;
+        call invalidate_config_cache() after rotating credentials.
+        
+        Returns:
+            True if configuration is valid and tracking API is accessible
+        """
+        if self._config_validated is not None:
+            return self._config_validated
+        
+        self._config_validated = self._run_config_checks()
+        return self._config_validated
+    
+    def invalidate_config_cache(self):
+        """
+        Forget the cached validate_config() result and the process-wide auth header.
+        
+        The session is re-authenticated from the current secrets, so the next
+        validate_config() re-probes the API with the rotated credentials.
+        """
+        self._config_validated = None
+        _resolve_auth_header.cache_clear()
+        self._setup_hardcoded_auth()
+    
+    def _run_config_checks(self) -> bool:
+        """
+        Run the configuration checks and live tracking API probe.
+        
         Returns:
             True if configuration is valid and tracking API is accessible
         """
@@ -277,31 +280,18 @@ class TrackingAPIEnricher(EnrichmentSource):
         """
         try:
             # Test with a dummy PRO number using correct brokerage key and valid carrier
-            test_url = f"{self.tracking_base_url}/pro-number/TEST123"
-            params = {
-                'brokerageKey': 'eshipping',  # Always use eshipping for tracking API
-                'browserTask': 'ESTES'  # Use valid carrier name that API accepts
-            }
-            
-            logger.info(f"🔍 DEBUG: Testing tracking API with URL: {test_url}")
-            logger.info(f"🔍 DEBUG: Test params: {params}")
-            logger.info(f"🔍 DEBUG: Session headers: {dict(self.session.headers)}")
+            test_url = self._pro_url_prefix + 'TEST123'
+            params = self._tracking_params
             
             response = self.session.get(
                 test_url,
                 params=params,
-                timeout=10
+                timeout=10,
+                allow_redirects=False
             )
             
-            logger.info(f"🔍 DEBUG: Response status: {response.status_code}")
-            logger.info(f"🔍 DEBUG: Response headers: {dict(response.headers)}")
-            
-            if response.status_code != 200:
-                try:
-                    response_text = response.text[:500]  # First 500 chars
-                    logger.info(f"🔍 DEBUG: Response body: {response_text}")
-                except:
-                    logger.info("🔍 DEBUG: Could not read response body")
+            if response.status_code != 200 and logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Tracking API test response %s: %s", response.status_code, response.text[:500])
             
             # Consider 404 as "accessible but no data" (good)
             # Consider 401/403 as "not authorized" (bad)  
@@ -310,20 +300,20 @@ class TrackingAPIEnricher(EnrichmentSource):
                 logger.info("✓ Tracking API is accessible")
                 return True
             elif response.status_code in [401, 403]:
-                logger.warning(f"✗ Tracking API authentication failed: {response.status_code}")
+                logger.warning("✗ Tracking API authentication failed: %s", response.status_code)
                 logger.warning("This brokerage may not have tracking API access enabled")
                 return False
             elif response.status_code == 422:
-                logger.warning(f"⚠️ Tracking API returned 422 (Unprocessable Entity) - request format issue")
+                logger.warning("⚠️ Tracking API returned 422 (Unprocessable Entity) - request format issue")
                 logger.warning("Authentication is working but API request format needs adjustment")
                 # For now, consider this a partial success since auth is working
                 return True
             else:
-                logger.warning(f"✗ Tracking API returned unexpected status: {response.status_code}")
+                logger.warning("✗ Tracking API returned unexpected status: %s", response.status_code)
                 return False
                 
         except Exception as e:
-            logger.warning(f"✗ Tracking API test failed: {str(e)}")
+            logger.warning("✗ Tracking API test failed: %s", e)
             return False
     
     def is_applicable(self, row: Dict[str, Any]) -> bool:
@@ -337,15 +327,6 @@ class TrackingAPIEnricher(EnrichmentSource):
             True if row has required PRO and carrier fields
         """
         pro_number, carrier = self._extract_row_data(row)
-        
-        # DEBUG: Log detailed applicability check
-        logger.info(f"🔍 DEBUG is_applicable: PRO='{pro_number}', Carrier='{carrier}'")
-        logger.info(f"🔍 DEBUG is_applicable: Result = {bool(pro_number and carrier)}")
-        if not pro_number:
-            logger.info(f"🔍 DEBUG is_applicable: No PRO number found in row")
-        if not carrier:
-            logger.info(f"🔍 DEBUG is_applicable: No carrier found in row")
-        
         return bool(pro_number and carrier)
     
     def _extract_row_data(self, row_data: Dict[str, Any]) -> tuple[Optional[str], Optional[str]]:
@@ -358,163 +339,257 @@ class TrackingAPIEnricher(EnrichmentSource):
         Returns:
             Tuple of (pro_number, carrier) or (None, None) if invalid
         """
-        # Extract PRO number - prioritize FF2API-sourced data over CSV fields
+        # Walk the precomputed priority chains (FF2API fields first, then CSV fields)
         pro_number = None
-        # First priority: PRO numbers from FF2API load details
-        ff2api_pro_fields = ['ff2api_pro_number', 'PRO']  # PRO is set by workflow from FF2API data
-        csv_pro_fields = [self.pro_column, 'Carrier Pro#', 'PRO', 'pro_number', 'ProNumber', 'tracking_number']
-        
-        # Try FF2API fields first
-        for pro_field in ff2api_pro_fields:
-            if pro_field in row_data and row_data[pro_field]:
-                pro_number = str(row_data[pro_field]).strip()
-                logger.debug(f"Using FF2API PRO number from field '{pro_field}': {pro_number}")
+        for pro_field in self._pro_field_chain:
+            value = row_data.get(pro_field)
+            if value:
+                pro_number = str(value).strip()
                 break
         
-        # Fallback to CSV fields if no FF2API data
-        if not pro_number:
-            for pro_field in csv_pro_fields:
-                if pro_field in row_data and row_data[pro_field]:
-                    pro_number = str(row_data[pro_field]).strip() 
-                    logger.debug(f"Using CSV PRO number from field '{pro_field}': {pro_number}")
-                    break
-        
         if not pro_number:
-            logger.info(f"🔍 DEBUG _extract_row_data: No PRO number found in row data")
-            logger.info(f"🔍 DEBUG _extract_row_data: Checked FF2API fields: {ff2api_pro_fields}")
-            logger.info(f"🔍 DEBUG _extract_row_data: Checked CSV fields: {csv_pro_fields}")
-            logger.info(f"🔍 DEBUG _extract_row_data: Available row fields: {list(row_data.keys())}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("No PRO number found in row data. Checked fields: %s, available fields: %s",
+                             self._pro_field_chain, list(row_data))
             return None, None
         
-        # Extract carrier - prioritize FF2API-sourced data over CSV fields
         carrier = None
-        # First priority: Carrier names from FF2API load details
-        ff2api_carrier_fields = ['ff2api_carrier_name', 'carrier']  # carrier is set by workflow from FF2API data
-        csv_carrier_fields = [self.carrier_column, 'Carrier Name', 'carrier', 'carrier_name', 'scac_code']
-        
-        # Try FF2API fields first
-        for carrier_field in ff2api_carrier_fields:
-            if carrier_field in row_data and row_data[carrier_field]:
-                carrier = str(row_data[carrier_field]).strip().upper()
-                logger.debug(f"Using FF2API carrier from field '{carrier_field}': {carrier}")
+        for carrier_field in self._carrier_field_chain:
+            value = row_data.get(carrier_field)
+            if value:
+                carrier = sys.intern(str(value).translate(_UPPER_TABLE).strip())
                 break
         
-        # Fallback to CSV fields if no FF2API data
         if not carrier:
-            for carrier_field in csv_carrier_fields:
-                if carrier_field in row_data and row_data[carrier_field]:
-                    carrier = str(row_data[carrier_field]).strip().upper()
-                    logger.debug(f"Using CSV carrier from field '{carrier_field}': {carrier}")
-                    break
-        
-        if not carrier:
-            logger.info(f"🔍 DEBUG _extract_row_data: No carrier found in row data")
-            logger.info(f"🔍 DEBUG _extract_row_data: Checked FF2API carrier fields: {ff2api_carrier_fields}")
-            logger.info(f"🔍 DEBUG _extract_row_data: Checked CSV carrier fields: {csv_carrier_fields}")
-            logger.info(f"🔍 DEBUG _extract_row_data: Available row fields: {list(row_data.keys())}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("No carrier found in row data. Checked fields: %s, available fields: %s",
+                             self._carrier_field_chain, list(row_data))
             return None, None
         
         return pro_number, carrier
     
+    def _create_session(self, config: Dict[str, Any]) -> requests.Session:
+        """
+        Create the HTTP session, backed by an on-disk response cache when configured.
+        
+        Setting persistent_cache (an SQLite path) reuses 200/404 responses across
+        runs for cache_ttl seconds; requires the optional requests-cache package.
+        
+        Args:
+            config: Enricher configuration
+            
+        Returns:
+            requests.Session (or requests_cache.CachedSession)
+        """
+        cache_path = config.get('persistent_cache')
+        if not cache_path:
+            return requests.Session()
+        
+        try:
+            import requests_cache
+        except ImportError:
+            logger.warning("persistent_cache configured but requests-cache is not installed; using in-memory cache only")
+            return requests.Session()
+        
+        logger.info("Using persistent tracking API cache: %s", cache_path)
+        return requests_cache.CachedSession(
+            cache_path,
+            backend='sqlite',
+            expire_after=config.get('cache_ttl', 3600),
+            allowable_codes=(200, 404)
+        )
+    
+    def _build_retry(self) -> Retry:
+        """
+        Build the urllib3 retry policy mounted on the tracking session.
+        
+        Retries 429 and 5xx responses (honoring Retry-After), timeouts and
+        connection errors with exponential backoff, up to max_retries attempts.
+        
+        Returns:
+            Configured Retry instance
+        """
+        retry_kwargs = {
+            'total': max(self.retry_count - 1, 0),
+            'backoff_factor': self.retry_delay,
+            'status_forcelist': (429, 500, 502, 503, 504),
+            'respect_retry_after_header': True,
+            'raise_on_status': False
+        }
+        try:
+            # urllib3 2.x: cap the delay and add jitter so batch workers do not retry in lockstep
+            return Retry(backoff_max=30, backoff_jitter=self.retry_delay, **retry_kwargs)
+        except TypeError:
+            return Retry(**retry_kwargs)
+    
     def _call_tracking_api(self, pro_number: str, carrier: str) -> Optional[Dict[str, Any]]:
         """
-        Make tracking API call with automatic retries.
+        Make tracking API call with automatic retries (via the session adapter).
         
         Args:
             pro_number: PRO/tracking number
             carrier: Carrier name for browser task
             
         Returns:
-            Tracking data dictionary or None if failed
+            Extracted tracking fields or None if failed
         """
-        # Create cache key
-        cache_key = f"{carrier}:{pro_number}"
+        cache_key = (carrier, pro_number)
+        
+        # Check cache first, then join any in-flight request for the same key
+        with self._cache_lock:
+            cached = self._cache_get(cache_key)
+            if cached is not _MISSING:
+                return cached
+            future = self._inflight.get(cache_key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._inflight[cache_key] = future
+        
+        if not is_owner:
+            return future.result()
         
-        # Check cache first
-        if cache_key in self._tracking_cache:
-            logger.debug(f"Using cached tracking data for {carrier} PRO {pro_number}")
-            return self._tracking_cache[cache_key]
+        try:
+            tracking_fields = self._fetch_tracking(pro_number, carrier, cache_key)
+            future.set_result(tracking_fields)
+            return tracking_fields
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._cache_lock:
+                self._inflight.pop(cache_key, None)
+    
+    def _fetch_tracking(self, pro_number: str, carrier: str,
+                        cache_key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        """
+        Fetch tracking data from the API and cache the outcome.
         
-        url = f"{self.tracking_base_url}/pro-number/{pro_number}"
-        params = {
-            'brokerageKey': 'eshipping',  # Always use eshipping for tracking API
-            'browserTask': 'ESTES'  # Always use ESTES regardless of carrier
-        }
+        Args:
+            pro_number: PRO/tracking number
+            carrier: Carrier name for browser task
+            cache_key: (carrier, pro_number) cache key
+            
+        Returns:
+            Extracted tracking fields or None if failed
+        """
+        # Fail fast while the circuit breaker is open
+        if self._circuit_open():
+            return None
         
-        logger.debug(f"🔍 DEBUG: Tracking API call - URL: {url}")
-        logger.debug(f"🔍 DEBUG: Tracking API call - Params: {params}")
-        logger.debug(f"🔍 DEBUG: Tracking API call - Headers: {dict(self.session.headers)}")
+        url = self._pro_url_prefix + pro_number
         
-        for attempt in range(self.retry_count):
-            try:
-                logger.debug(f"Tracking API call attempt {attempt + 1}: {url}")
-                logger.debug(f"Parameters: {params}")
-                
-                response = self.session.get(
-                    url,
-                    params=params,
-                    timeout=self.timeout
-                )
-                
-                logger.debug(f"🔍 DEBUG: Tracking API response status: {response.status_code}")
-                if response.status_code != 200:
-                    logger.debug(f"🔍 DEBUG: Tracking API response body: {response.text[:300]}")
-                
-                if response.status_code == 200:
-                    tracking_data = response.json()
-                    logger.debug(f"Tracking API success for PRO {pro_number}: {tracking_data.get('result', {}).get('status', 'Unknown')}")
-                    
-                    # Cache the successful result
-                    self._tracking_cache[cache_key] = tracking_data
-                    return tracking_data
-                
-                elif response.status_code == 404:
-                    logger.info(f"Tracking not found for PRO {pro_number} with carrier {carrier}")
-                    # Cache the failure to avoid repeated attempts
-                    self._tracking_cache[cache_key] = None
-                    return None
-                
-                elif response.status_code == 429:
-                    logger.warning(f"Rate limited on tracking API. Attempt {attempt + 1}")
-                    if attempt < self.retry_count - 1:
-                        time.sleep(self.retry_delay * (2 ** attempt))  # Exponential backoff
-                        continue
-                
-                elif response.status_code in [401, 403]:
-                    logger.error(f"Authentication failed for tracking API: {response.status_code}")
-                    logger.error("Check hardcoded tracking API credentials in secrets")
-                    logger.error("Update tracking_api.bearer_token or tracking_api.api_key in Streamlit secrets")
-                    # Cache the auth failure to avoid repeated attempts
-                    self._tracking_cache[cache_key] = None
-                    return None
-                
-                else:
-                    logger.warning(f"Tracking API returned {response.status_code} for PRO {pro_number}")
-                    if attempt < self.retry_count - 1:
-                        time.sleep(self.retry_delay)
-                        continue
-                
-            except requests.exceptions.Timeout:
-                logger.warning(f"Tracking API timeout for PRO {pro_number}. Attempt {attempt + 1}")
-                if attempt < self.retry_count - 1:
-                    time.sleep(self.retry_delay)
-                    continue
+        # Retries for 429/5xx, timeouts and connection errors happen inside the
+        # session adapter (see _build_retry); only the final outcome lands here
+        try:
+            response = self.session.get(
+                url,
+                params=self._tracking_params,
+                timeout=self.timeout,
+                allow_redirects=False
+            )
             
-            except requests.exceptions.ConnectionError:
-                logger.warning(f"Tracking API connection error for PRO {pro_number}. Attempt {attempt + 1}")
-                if attempt < self.retry_count - 1:
-                    time.sleep(self.retry_delay)
-                    continue
+            if response.status_code == 200:
+                # Cache only the extracted fields, not the full response
+                tracking_fields = self._extract_tracking_fields(_json_loads(response.content))
+                self._cache_put(cache_key, tracking_fields)
+                self._record_success()
+                return tracking_fields
             
-            except Exception as e:
-                logger.error(f"Unexpected error in tracking API call: {e}")
-                break
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Tracking API response %s: %s", response.status_code, response.text[:300])
+            
+            if response.status_code == 404:
+                logger.info("Tracking not found for PRO %s with carrier %s", pro_number, carrier)
+                # Cache the miss briefly to avoid repeated attempts
+                self._cache_put_negative(cache_key, self.NOT_FOUND_CACHE_TTL)
+                self._record_success()
+                return None
+            
+            if response.status_code in [401, 403]:
+                logger.error("Authentication failed for tracking API: %s", response.status_code)
+                logger.error("Check hardcoded tracking API credentials in secrets")
+                logger.error("Update tracking_api.bearer_token or tracking_api.api_key in Streamlit secrets")
+            else:
+                logger.warning("Tracking API returned %s for PRO %s", response.status_code, pro_number)
+        
+        except requests.exceptions.Timeout:
+            logger.warning("Tracking API timeout for PRO %s after %s attempts", pro_number, self.retry_count)
+        
+        except requests.exceptions.ConnectionError:
+            logger.warning("Tracking API connection error for PRO %s after %s attempts", pro_number, self.retry_count)
+        
+        except Exception as e:
+            logger.error("Unexpected error in tracking API call: %s", e)
         
-        logger.warning(f"Tracking API failed after {self.retry_count} attempts for PRO {pro_number}")
-        # Cache the failure to avoid repeated attempts
-        self._tracking_cache[cache_key] = None
+        # Cache the failure briefly to avoid repeated attempts
+        self._cache_put_negative(cache_key, self.ERROR_CACHE_TTL)
+        self._record_failure()
         return None
     
+    def _cache_get(self, cache_key: Tuple[str, str]) -> Any:
+        """
+        Look up a cached result, marking it most recently used. Caller must hold _cache_lock.
+        
+        Returns:
+            Cached tracking fields, None for a live negative entry, or _MISSING
+        """
+        expires_at = self._negative_cache.get(cache_key)
+        if expires_at is not None:
+            if time.time() <= expires_at:
+                return None
+            del self._negative_cache[cache_key]
+            return _MISSING
+        
+        value = self._tracking_cache.get(cache_key, _MISSING)
+        if value is not _MISSING:
+            self._tracking_cache.move_to_end(cache_key)
+        return value
+    
+    def _cache_put(self, cache_key: Tuple[str, str], value: Dict[str, Any]):
+        """Store tracking fields, evicting the least recently used entry beyond tracking_cache_max."""
+        with self._cache_lock:
+            self._tracking_cache[cache_key] = value
+            if len(self._tracking_cache) > self._cache_max:
+                self._tracking_cache.popitem(last=False)
+    
+    def _cache_put_negative(self, cache_key: Tuple[str, str], ttl: float):
+        """
+        Remember a failed lookup for ttl seconds without touching the positive LRU.
+        
+        Args:
+            cache_key: (carrier, pro_number) cache key
+            ttl: Seconds until the lookup may be retried
+        """
+        with self._cache_lock:
+            self._negative_cache.pop(cache_key, None)
+            self._negative_cache[cache_key] = time.time() + ttl
+            if len(self._negative_cache) > self._cache_max:
+                # Entries are in insertion order, so the first is the oldest
+                del self._negative_cache[next(iter(self._negative_cache))]
+    
+    def _circuit_open(self) -> bool:
+        """Check whether the circuit breaker is currently failing calls fast."""
+        with self._cb_lock:
+            return time.time() < self._cb_open_until
+    
+    def _record_success(self):
+        """Reset the consecutive failure count after a definitive API answer."""
+        with self._cb_lock:
+            self._cb_failures = 0
+    
+    def _record_failure(self):
+        """Count a terminal tracking API failure and open the circuit breaker at the threshold."""
+        with self._cb_lock:
+            self._cb_failures += 1
+            opened = self._cb_failures >= self._cb_threshold
+            if opened:
+                self._cb_open_until = time.time() + self._cb_cooldown
+                self._cb_failures = 0
+        
+        if opened:
+            logger.warning("Tracking API circuit breaker opened for %ss after repeated failures", self._cb_cooldown)
+    
     def _extract_tracking_fields(self, tracking_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Extract and normalize tracking fields from API response.
@@ -525,38 +600,48 @@ class TrackingAPIEnricher(EnrichmentSource):
         Returns:
             Normalized tracking fields
         """
-        result = tracking_data.get('result', {})
-        
-        # Extract tracking information
-        tracking_fields = {
-            'tracking_status': result.get('status', ''),
-            'tracking_detailed_status': result.get('detailedStatus', ''),
-            'tracking_city': result.get('city', ''),
-            'tracking_state': result.get('state', ''),
-            'tracking_country': result.get('country', ''),
-            'tracking_date': result.get('data', ''),
-            'tracking_location': '',
-            'tracking_updated_at': tracking_data.get('updatedAt', '')
-        }
-        
-        # Combine location fields
-        location_parts = []
-        if tracking_fields['tracking_city']:
-            location_parts.append(tracking_fields['tracking_city'])
-        if tracking_fields['tracking_state']:
-            location_parts.append(tracking_fields['tracking_state'])
-        if tracking_fields['tracking_country'] and tracking_fields['tracking_country'] != 'US':
-            location_parts.append(tracking_fields['tracking_country'])
-        
-        tracking_fields['tracking_location'] = ', '.join(location_parts)
-        
-        # Clean up empty fields
-        return {k: v for k, v in tracking_fields.items() if v}
+        result = tracking_data.get('result') or {}
+        city = result.get('city')
+        state = result.get('state')
+        country = result.get('country')
+        
+        # Build the result directly, keeping only non-empty fields
+        tracking_fields = {}
+        value = result.get('status')
+        if value:
+            tracking_fields['tracking_status'] = value
+        value = result.get('detailedStatus')
+        if value:
+            tracking_fields['tracking_detailed_status'] = value
+        if city:
+            tracking_fields['tracking_city'] = city
+        if state:
+            tracking_fields['tracking_state'] = state
+        if country:
+            tracking_fields['tracking_country'] = country
+        value = result.get('data')
+        if value:
+            tracking_fields['tracking_date'] = value
+        
+        # Combine location fields (country only when outside the US)
+        location_parts = [part for part in (city, state, country if country != 'US' else None) if part]
+        if location_parts:
+            tracking_fields['tracking_location'] = ', '.join(location_parts)
+        
+        value = tracking_data.get('updatedAt')
+        if value:
+            tracking_fields['tracking_updated_at'] = value
+        
+        return tracking_fields
     
     def enrich(self, row_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Enrich a single CSV row with real-time tracking data.
         
+        Rows without a PRO number and carrier get only the tracking placeholders
+        (or are returned unchanged when placeholders are disabled), so callers
+        do not need to call is_applicable() first.
+        
         Args:
             row_data: Dictionary containing CSV row data
             
@@ -567,31 +652,88 @@ class TrackingAPIEnricher(EnrichmentSource):
             logger.error("Tracking API configuration is invalid")
             return row_data
         
-        # Initialize tracking fields
-        enriched_row = row_data.copy()
-        enriched_row.update({
-            'tracking_status': None,
-            'tracking_location': None,
-            'tracking_date': None
-        })
-        
         # Validate and extract required fields
         pro_number, carrier = self._extract_row_data(row_data)
         if not pro_number or not carrier:
             logger.debug("Missing PRO number or carrier for tracking enrichment")
-            return enriched_row
+            return self._merge_tracking_fields(row_data, None)
         
         # Make tracking API call
-        tracking_data = self._call_tracking_api(pro_number, carrier)
-        if not tracking_data:
-            logger.debug(f"No tracking data available for PRO {pro_number}")
-            return enriched_row
+        tracking_fields = self._call_tracking_api(pro_number, carrier)
+        if not tracking_fields:
+            logger.debug("No tracking data available for PRO %s", pro_number)
+        else:
+            logger.debug("Successfully enriched PRO %s with tracking data", pro_number)
         
-        # Extract and merge tracking fields
-        tracking_fields = self._extract_tracking_fields(tracking_data)
+        return self._merge_tracking_fields(row_data, tracking_fields)
+    
+    def _merge_tracking_fields(self, row_data: Dict[str, Any],
+                               tracking_fields: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Copy a row and merge tracking fields into it over the tracking placeholders.
         
-        # Merge with original row data
-        enriched_row.update(tracking_fields)
+        Args:
+            row_data: Dictionary containing CSV row data
+            tracking_fields: Extracted tracking fields, or None if unavailable
+            
+        Returns:
+            New row dictionary with tracking fields, or row_data itself when there
+            is no tracking data and placeholders are disabled
+        """
+        if not tracking_fields and not self.add_tracking_placeholders:
+            return row_data
         
-        logger.debug(f"Successfully enriched PRO {pro_number} with tracking data")
-        return enriched_row
\ No newline at end of file
+        enriched_row = row_data | _TRACKING_PLACEHOLDERS
+        if tracking_fields:
+            enriched_row |= tracking_fields
+        return enriched_row
+    
+    def enrich_batch(self, rows: List[Dict[str, Any]], max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Enrich multiple CSV rows, issuing tracking API calls concurrently.
+        
+        Rows sharing a (carrier, PRO) pair trigger a single API call whose
+        result is applied to every matching row.
+        
+        Args:
+            rows: List of dictionaries containing CSV row data
+            max_workers: Maximum concurrent API calls (defaults to max_workers config)
+            
+        Returns:
+            Enriched rows in the same order as the input
+        """
+        if not rows:
+            return rows
+        
+        # Probe once up front rather than racing the probe from every worker
+        if not self.validate_config():
+            logger.error("Tracking API configuration is invalid")
+            return list(rows)
+        
+        keys = [self._extract_row_data(row) for row in rows]
+        unique_keys = list(dict.fromkeys(key for key in keys if key[0] and key[1]))
+        
+        results = self._resolve_keys(unique_keys, max_workers)
+        
+        logger.info("Tracking enrichment: %d rows, %d unique PRO/carrier pairs", len(rows), len(unique_keys))
+        
+        # Rows without a usable key still get the placeholder columns, as in enrich()
+        return [self._merge_tracking_fields(row, results.get(key)) for row, key in zip(rows, keys)]
+    
+    def _resolve_keys(self, unique_keys: List[Tuple[str, str]],
+                      max_workers: Optional[int] = None) -> Dict[Tuple[str, str], Optional[Dict[str, Any]]]:
+        """
+        Resolve unique (pro_number, carrier) pairs concurrently.
+        
+        Args:
+            unique_keys: Deduplicated (pro_number, carrier) pairs
+            max_workers: Maximum concurrent API calls (defaults to max_workers config)
+            
+        Returns:
+            Mapping of each pair to its extracted tracking fields (or None)
+        """
+        if not unique_keys:
+            return {}
+        with ThreadPoolExecutor(max_workers=max_workers or self.max_workers) as executor:
+            resolved = executor.map(lambda key: self._call_tracking_api(*key), unique_keys)
+            return dict(zip(unique_keys, resolved))
@@ -6,7 +6,12 @@ Run this locally to get the access_token and refresh_token for your Streamlit se
 
 import requests
 import urllib.parse
-import json
+
+try:
+    from cryptography.fernet import Fernet
+    _HAS_FERNET = True
+except ImportError:
+    _HAS_FERNET = False
 
 def get_google_drive_tokens():
     """Generate OAuth tokens for Google Drive access"""
@@ -91,12 +96,10 @@ token_encryption_key = "{}"
 
 def generate_encryption_key():
     """Generate a secure encryption key"""
-    try:
-        from cryptography.fernet import Fernet
+    if _HAS_FERNET:
         return Fernet.generate_key().decode()
-    except ImportError:
-        print("⚠️  WARNING: cryptography package not found. Install with: pip install cryptography")
-        return "GENERATE_KEY_MANUALLY"
+    print("⚠️  WARNING: cryptography package not found. Install with: pip install cryptography")
+    return "GENERATE_KEY_MANUALLY"
 
 if __name__ == "__main__":
     get_google_drive_tokens()
\ No newline at end of file
@@ -9,16 +9,22 @@ Provides secure Gmail API access through OAuth2 authentication flow:
 """
 
 import os
+import functools
 import json
 import base64
 import logging
-from typing import Dict, Any, Optional, List
+import time
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timedelta
-from cryptography.fernet import Fernet
-from dataclasses import dataclass
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from dataclasses import dataclass, field
 import streamlit as st
 import requests
-from urllib.parse import urlencode, parse_qs
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import quote, parse_qs
 
 logger = logging.getLogger(__name__)
 
@@ -32,13 +38,40 @@ class GmailCredentials:
     scopes: List[str]
     client_id: str
 
-@dataclass
+@dataclass(frozen=True)
 class GmailAuthConfig:
     """Gmail OAuth2 configuration."""
     client_id: str
     client_secret: str
     redirect_uri: str
     scopes: List[str]
+    scope_string: str = field(init=False)
+    
+    def __post_init__(self):
+        object.__setattr__(self, 'scope_string', ' '.join(self.scopes))
+
+def decode_id_token_claims(id_token: Optional[str]) -> Dict[str, Any]:
+    """
+    Read the claims of an ID token returned by Google's token endpoint.
+    
+    The token is received directly from Google over TLS, so the signature
+    is not re-verified here.
+    
+    Args:
+        id_token: JWT from the token response, if any
+        
+    Returns:
+        Claims dict, or empty dict if absent or malformed
+    """
+    if not id_token:
+        return {}
+    try:
+        payload = id_token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload))
+    except Exception as e:
+        logger.debug(f"Could not decode id_token: {e}")
+        return {}
 
 class GmailAuthService:
     """Gmail OAuth2 authentication and token management service."""
@@ -50,10 +83,38 @@ class GmailAuthService:
         'https://www.googleapis.com/auth/userinfo.email'
     ]
     
+    # Static consent URL; offline access gets a refresh token, prompt=consent forces the consent screen
+    _AUTH_URL_TEMPLATE = (
+        "https://accounts.google.com/o/oauth2/v2/auth"
+        "?response_type=code&access_type=offline&prompt=consent"
+        "&include_granted_scopes=true"
+        "&client_id={client_id}&redirect_uri={redirect_uri}&scope={scope}"
+    )
+    
+    # Treat access tokens as expired this many seconds early when serving from cache
+    TOKEN_EXPIRY_BUFFER_SECONDS = 300
+    
+    # Every Fernet token starts with these bytes (version 0x80 and a zero high timestamp)
+    FERNET_TOKEN_PREFIX = b'gAAAAA'
+    
+    # Token endpoint errors meaning the client_id/client_secret pair itself was rejected
+    CLIENT_REJECTED_ERRORS = frozenset(('invalid_client', 'unauthorized_client'))
+    
+    # st.session_state key of the per-session access token cache:
+    # brokerage_key -> (credentials, time.monotonic() deadline)
+    TOKEN_CACHE_KEY = 'gmail_token_cache'
+    
     def __init__(self):
         """Initialize Gmail authentication service."""
-        self.encryption_key = self._get_or_create_encryption_key()
-        self.cipher = Fernet(self.encryption_key)
+        encryption_keys = self._get_encryption_keys()
+        self.encryption_key = encryption_keys[0]
+        self._primary_cipher = Fernet(self.encryption_key)
+        # Encrypts with the newest key, decrypts with any configured key
+        self.cipher = MultiFernet([Fernet(key) for key in encryption_keys])
+        self._session = self._create_session()
+        # stored brokerage key (as in the file name) -> (file mtime_ns, decrypted credentials)
+        self._load_cache: Dict[str, Tuple[int, GmailCredentials]] = {}
+        self._auth_config_cache: Dict[str, GmailAuthConfig] = {}
         
     def get_auth_config(self, brokerage_key: str) -> Optional[GmailAuthConfig]:
         """
@@ -65,6 +126,10 @@ class GmailAuthService:
         Returns:
             GmailAuthConfig or None if not configured
         """
+        cached = self._auth_config_cache.get(brokerage_key)
+        if cached:
+            return cached
+        
         try:
             # Check secrets for OAuth2 configuration
             gmail_oauth = st.secrets.get("gmail_oauth", {})
@@ -81,17 +146,51 @@ class GmailAuthService:
                 logger.error(f"Missing Gmail OAuth2 fields for {brokerage_key}: {missing_fields}")
                 return None
             
-            return GmailAuthConfig(
+            auth_config = GmailAuthConfig(
                 client_id=brokerage_config['client_id'],
                 client_secret=brokerage_config['client_secret'],
                 redirect_uri=brokerage_config['redirect_uri'],
                 scopes=brokerage_config.get('scopes', self.REQUIRED_SCOPES)
             )
+            self._auth_config_cache[brokerage_key] = auth_config
+            return auth_config
             
         except Exception as e:
             logger.error(f"Error getting Gmail auth config for {brokerage_key}: {e}")
             return None
     
+    def clear_auth_config_cache(self, brokerage_key: Optional[str] = None):
+        """
+        Forget memoized OAuth2 configs so changed secrets are picked up.
+        
+        get_gmail_auth_service.cache_clear() drops the whole shared instance,
+        and with it this cache, as well.
+        
+        Args:
+            brokerage_key: Brokerage to forget, or None to forget all of them
+        """
+        if brokerage_key is None:
+            self._auth_config_cache.clear()
+        else:
+            self._auth_config_cache.pop(brokerage_key, None)
+    
+    def _forget_rejected_auth_config(self, brokerage_key: str, response: requests.Response):
+        """
+        Drop the memoized OAuth2 config when Google rejects the client itself.
+        
+        A rotated client_secret in secrets first shows up as invalid_client or
+        unauthorized_client from the token endpoint, so the next attempt re-reads secrets.
+        """
+        if response.status_code not in (400, 401):
+            return
+        try:
+            error = response.json().get('error')
+        except ValueError:
+            return
+        if error in self.CLIENT_REJECTED_ERRORS:
+            logger.warning(f"Google rejected the OAuth2 client for {brokerage_key}; reloading its config")
+            self.clear_auth_config_cache(brokerage_key)
+    
     def generate_auth_url(self, brokerage_key: str, state: str = None) -> Optional[str]:
         """
         Generate Gmail OAuth2 authorization URL.
@@ -108,20 +207,14 @@ class GmailAuthService:
             if not auth_config:
                 return None
             
-            params = {
-                'client_id': auth_config.client_id,
-                'redirect_uri': auth_config.redirect_uri,
-                'scope': ' '.join(auth_config.scopes),
-                'response_type': 'code',
-                'access_type': 'offline',  # Get refresh token
-                'prompt': 'consent',  # Force consent screen
-                'include_granted_scopes': 'true'
-            }
+            auth_url = self._AUTH_URL_TEMPLATE.format(
+                client_id=quote(auth_config.client_id, safe=''),
+                redirect_uri=quote(auth_config.redirect_uri, safe=''),
+                scope=quote(auth_config.scope_string, safe='')
+            )
             
             if state:
-                params['state'] = state
-            
-            auth_url = f"https://accounts.google.com/o/oauth2/v2/auth?{urlencode(params)}"
+                auth_url += f"&state={quote(state, safe='')}"
             logger.info(f"Generated Gmail auth URL for {brokerage_key}")
             return auth_url
             
@@ -155,12 +248,15 @@ class GmailAuthService:
                 'redirect_uri': auth_config.redirect_uri
             }
             
-            response = requests.post(token_url, data=data)
+            response = self._session.post(token_url, data=data)
+            self._forget_rejected_auth_config(brokerage_key, response)
             response.raise_for_status()
             token_data = response.json()
             
-            # Get user info
-            user_info = self._get_user_info(token_data['access_token'])
+            # Get user info, avoiding the userinfo round trip when the id_token carries the email
+            user_info = decode_id_token_claims(token_data.get('id_token'))
+            if not user_info.get('email'):
+                user_info = self._get_user_info(token_data['access_token'])
             
             # Calculate token expiry
             expires_in = token_data.get('expires_in', 3600)
@@ -196,27 +292,37 @@ class GmailAuthService:
             GmailCredentials or None if not found/invalid
         """
         try:
+            # Serve a still-valid access token from this session's cache
+            token_cache = self._session_store(self.TOKEN_CACHE_KEY)
+            cached = token_cache.get(brokerage_key) if token_cache is not None else None
+            if cached and time.monotonic() < cached[1]:
+                return cached[0]
+            
+            now = datetime.now()
+            
             # Try session state first
-            if hasattr(st, 'session_state') and hasattr(st.session_state, 'gmail_credentials'):
-                session_creds = st.session_state.gmail_credentials.get(brokerage_key)
-                if session_creds:
-                    # Check if token needs refresh
-                    if datetime.now() >= session_creds.token_expiry:
-                        refreshed = self.refresh_credentials(brokerage_key, session_creds)
-                        if refreshed:
-                            return refreshed
-                    else:
-                        return session_creds
+            session_store = self._session_store('gmail_credentials')
+            session_creds = session_store.get(brokerage_key) if session_store is not None else None
+            if session_creds:
+                # Check if token needs refresh
+                if now >= session_creds.token_expiry:
+                    refreshed = self.refresh_credentials(brokerage_key, session_creds)
+                    if refreshed:
+                        return refreshed
+                else:
+                    self._cache_token(brokerage_key, session_creds)
+                    return session_creds
             
             # Try encrypted storage
             stored_creds = self._load_encrypted_credentials(brokerage_key)
             if stored_creds:
                 # Check if token needs refresh
-                if datetime.now() >= stored_creds.token_expiry:
+                if now >= stored_creds.token_expiry:
                     refreshed = self.refresh_credentials(brokerage_key, stored_creds)
                     if refreshed:
                         return refreshed
                 else:
+                    self._cache_token(brokerage_key, stored_creds)
                     return stored_creds
             
             return None
@@ -235,10 +341,11 @@ class GmailAuthService:
         """
         try:
             # Store in session state for immediate use
-            if not hasattr(st.session_state, 'gmail_credentials'):
-                st.session_state.gmail_credentials = {}
+            session_store = self._session_store('gmail_credentials')
+            if session_store is not None:
+                session_store[brokerage_key] = credentials
             
-            st.session_state.gmail_credentials[brokerage_key] = credentials
+            self._cache_token(brokerage_key, credentials)
             
             # Store encrypted for persistence
             self._save_encrypted_credentials(brokerage_key, credentials)
@@ -259,6 +366,16 @@ class GmailAuthService:
         Returns:
             Refreshed GmailCredentials or None if refresh failed
         """
+        refreshed_credentials = self._request_refreshed_credentials(brokerage_key, credentials)
+        if refreshed_credentials:
+            # Store refreshed credentials
+            self.store_credentials(brokerage_key, refreshed_credentials)
+            logger.info(f"Refreshed Gmail credentials for {brokerage_key}")
+        return refreshed_credentials
+    
+    def _request_refreshed_credentials(self, brokerage_key: str,
+                                       credentials: GmailCredentials) -> Optional[GmailCredentials]:
+        """Exchange the refresh token for a new access token without storing it."""
         try:
             if not credentials.refresh_token:
                 logger.warning(f"No refresh token available for {brokerage_key}")
@@ -277,7 +394,8 @@ class GmailAuthService:
                 'grant_type': 'refresh_token'
             }
             
-            response = requests.post(token_url, data=data)
+            response = self._session.post(token_url, data=data)
+            self._forget_rejected_auth_config(brokerage_key, response)
             response.raise_for_status()
             token_data = response.json()
             
@@ -286,7 +404,7 @@ class GmailAuthService:
             new_expiry = datetime.now() + timedelta(seconds=expires_in)
             
             # Update credentials
-            refreshed_credentials = GmailCredentials(
+            return GmailCredentials(
                 access_token=token_data['access_token'],
                 refresh_token=credentials.refresh_token,  # Keep existing refresh token
                 token_expiry=new_expiry,
@@ -295,12 +413,6 @@ class GmailAuthService:
                 client_id=credentials.client_id
             )
             
-            # Store refreshed credentials
-            self.store_credentials(brokerage_key, refreshed_credentials)
-            
-            logger.info(f"Refreshed Gmail credentials for {brokerage_key}")
-            return refreshed_credentials
-            
         except Exception as e:
             logger.error(f"Error refreshing credentials for {brokerage_key}: {e}")
             return None
@@ -320,11 +432,13 @@ class GmailAuthService:
             if credentials:
                 # Revoke token with Google
                 revoke_url = f"https://oauth2.googleapis.com/revoke?token={credentials.access_token}"
-                requests.post(revoke_url)
+                self._session.post(revoke_url)
             
             # Remove from session state
-            if hasattr(st.session_state, 'gmail_credentials'):
-                st.session_state.gmail_credentials.pop(brokerage_key, None)
+            for key in ('gmail_credentials', self.TOKEN_CACHE_KEY):
+                session_store = self._session_store(key)
+                if session_store is not None:
+                    session_store.pop(brokerage_key, None)
             
             # Remove encrypted storage
             self._delete_encrypted_credentials(brokerage_key)
@@ -353,7 +467,7 @@ class GmailAuthService:
             
             # Test with Gmail API
             headers = {'Authorization': f'Bearer {credentials.access_token}'}
-            response = requests.get(
+            response = self._session.get(
                 'https://gmail.googleapis.com/gmail/v1/users/me/profile',
                 headers=headers
             )
@@ -373,11 +487,44 @@ class GmailAuthService:
             logger.error(f"Error testing credentials for {brokerage_key}: {e}")
             return {'success': False, 'message': f'Test failed: {str(e)}'}
     
+    def _create_session(self) -> requests.Session:
+        """Create a pooled HTTP session shared by all OAuth and Gmail API calls."""
+        session = requests.Session()
+        retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+        session.mount('https://', adapter)
+        return session
+    
+    def _session_store(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a dict kept in st.session_state under key, creating it if needed.
+        
+        Returns:
+            The per-session dict, or None outside a Streamlit script run
+            (e.g. background threads and CLI scripts)
+        """
+        try:
+            return st.session_state.setdefault(key, {})
+        except Exception as e:
+            logger.debug("Streamlit session state unavailable: %s", e)
+            return None
+    
+    def _cache_token(self, brokerage_key: str, credentials: GmailCredentials):
+        """Cache credentials for this session until shortly before the access token expires."""
+        token_cache = self._session_store(self.TOKEN_CACHE_KEY)
+        if token_cache is None:
+            return
+        remaining = (credentials.token_expiry - datetime.now()).total_seconds() - self.TOKEN_EXPIRY_BUFFER_SECONDS
+        if remaining > 0:
+            token_cache[brokerage_key] = (credentials, time.monotonic() + remaining)
+        else:
+            token_cache.pop(brokerage_key, None)
+    
     def _get_user_info(self, access_token: str) -> Dict[str, Any]:
         """Get user information from Google API."""
         try:
             headers = {'Authorization': f'Bearer {access_token}'}
-            response = requests.get(
+            response = self._session.get(
                 'https://www.googleapis.com/oauth2/v2/userinfo',
                 headers=headers
             )
@@ -388,26 +535,65 @@ class GmailAuthService:
             logger.error(f"Error getting user info: {e}")
             return {}
     
-    def _get_or_create_encryption_key(self) -> bytes:
-        """Get or create encryption key for secure storage."""
+    def _get_encryption_keys(self) -> List[bytes]:
+        """
+        Collect Fernet keys for credential storage, newest first.
+        
+        Keys are derived from google.token_encryption_keys (newest first, list or
+        comma-separated string) or the single google.token_encryption_key. An
+        existing config/encryption.key is kept last so older files still decrypt;
+        it is only created when no secret is configured.
+        
+        Returns:
+            Non-empty list of Fernet keys; the first one encrypts new data
+        """
+        keys = []
+        # Prefer keys derived from long-lived secrets so they survive container restarts
+        try:
+            google_secrets = st.secrets.get("google", {})
+            secrets_list = google_secrets.get("token_encryption_keys")
+            if isinstance(secrets_list, str):
+                secrets_list = secrets_list.split(',')
+            if not secrets_list:
+                secrets_list = [google_secrets.get("token_encryption_key")]
+            for secret in secrets_list:
+                if secret and secret.strip():
+                    keys.append(self._derive_encryption_key(secret.strip()))
+        except Exception as e:
+            logger.warning(f"Could not derive encryption key from secrets: {e}")
+        
+        file_key = self._get_or_create_file_key(create=not keys)
+        if file_key and file_key not in keys:
+            keys.append(file_key)
+        
+        # Fallback to session-only storage
+        return keys or [Fernet.generate_key()]
+    
+    def _get_or_create_file_key(self, create: bool) -> Optional[bytes]:
+        """Read config/encryption.key, creating it if requested and missing."""
         try:
             key_file = os.path.join('config', 'encryption.key')
             
             if os.path.exists(key_file):
                 with open(key_file, 'rb') as f:
                     return f.read()
-            else:
+            elif create:
                 # Create new key
                 key = Fernet.generate_key()
                 os.makedirs(os.path.dirname(key_file), exist_ok=True)
                 with open(key_file, 'wb') as f:
                     f.write(key)
                 return key
+            return None
                 
         except Exception as e:
             logger.error(f"Error with encryption key: {e}")
-            # Fallback to session-only storage
-            return Fernet.generate_key()
+            return None
+    
+    def _derive_encryption_key(self, secret: str) -> bytes:
+        """Derive a Fernet key from a secret string with HKDF-SHA256."""
+        hkdf = HKDF(algorithm=hashes.SHA256(), length=32, salt=b"ff2api-gmail", info=b"fernet-key")
+        return base64.urlsafe_b64encode(hkdf.derive(secret.encode()))
     
     def _save_encrypted_credentials(self, brokerage_key: str, credentials: GmailCredentials):
         """Save credentials with encryption."""
@@ -421,17 +607,17 @@ class GmailAuthService:
                 'client_id': credentials.client_id
             }
             
-            # Encrypt and encode
-            encrypted_data = self.cipher.encrypt(json.dumps(creds_data).encode())
-            encoded_data = base64.b64encode(encrypted_data).decode()
+            # Fernet tokens are already URL-safe base64, so store them as-is
+            encrypted_data = self.cipher.encrypt(json.dumps(creds_data, separators=(',', ':')).encode())
             
             # Store in config directory
             config_dir = 'config'
             os.makedirs(config_dir, exist_ok=True)
             
             creds_file = os.path.join(config_dir, f'gmail_creds_{brokerage_key.replace("-", "_")}.enc')
-            with open(creds_file, 'w') as f:
-                f.write(encoded_data)
+            self._load_cache.pop(brokerage_key.replace("-", "_"), None)
+            with open(creds_file, 'wb') as f:
+                f.write(encrypted_data)
                 
         except Exception as e:
             logger.error(f"Error saving encrypted credentials: {e}")
@@ -439,35 +625,60 @@ class GmailAuthService:
     def _load_encrypted_credentials(self, brokerage_key: str) -> Optional[GmailCredentials]:
         """Load credentials from encrypted storage."""
         try:
-            creds_file = os.path.join('config', f'gmail_creds_{brokerage_key.replace("-", "_")}.enc')
+            creds_key = brokerage_key.replace("-", "_")
+            creds_file = os.path.join('config', f'gmail_creds_{creds_key}.enc')
             
-            if not os.path.exists(creds_file):
+            try:
+                mtime_ns = os.stat(creds_file).st_mtime_ns
+            except FileNotFoundError:
+                self._load_cache.pop(creds_key, None)
                 return None
             
-            with open(creds_file, 'r') as f:
-                encoded_data = f.read()
-            
-            # Decode and decrypt
-            encrypted_data = base64.b64decode(encoded_data.encode())
-            decrypted_data = self.cipher.decrypt(encrypted_data)
-            creds_data = json.loads(decrypted_data.decode())
-            
-            return GmailCredentials(
-                access_token=creds_data['access_token'],
-                refresh_token=creds_data['refresh_token'],
-                token_expiry=datetime.fromisoformat(creds_data['token_expiry']),
-                email=creds_data['email'],
-                scopes=creds_data['scopes'],
-                client_id=creds_data['client_id']
-            )
+            return self._read_credentials_file(creds_key, creds_file, mtime_ns)
             
         except Exception as e:
             logger.error(f"Error loading encrypted credentials: {e}")
             return None
     
+    def _read_credentials_file(self, creds_key: str, creds_file: str, mtime_ns: int) -> GmailCredentials:
+        """Decrypt a credentials file, reusing the cached result while its mtime is unchanged."""
+        # Skip the decrypt when the file has not changed since the last load
+        cached = self._load_cache.get(creds_key)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+        
+        with open(creds_file, 'rb') as f:
+            encrypted_data = f.read().strip()
+        
+        # Files written before raw storage wrap the Fernet token in another base64 layer
+        if not encrypted_data.startswith(self.FERNET_TOKEN_PREFIX):
+            encrypted_data = base64.b64decode(encrypted_data)
+        try:
+            decrypted_data = self._primary_cipher.decrypt(encrypted_data)
+        except InvalidToken:
+            # Written under an older key: decrypt with any known key and re-encrypt under the newest
+            decrypted_data = self.cipher.decrypt(encrypted_data)
+            with open(creds_file, 'wb') as f:
+                f.write(self.cipher.rotate(encrypted_data))
+            mtime_ns = os.stat(creds_file).st_mtime_ns
+            logger.info(f"Re-encrypted {os.path.basename(creds_file)} with the current key")
+        creds_data = json.loads(decrypted_data.decode())
+        
+        credentials = GmailCredentials(
+            access_token=creds_data['access_token'],
+            refresh_token=creds_data['refresh_token'],
+            token_expiry=datetime.fromisoformat(creds_data['token_expiry']),
+            email=creds_data['email'],
+            scopes=creds_data['scopes'],
+            client_id=creds_data['client_id']
+        )
+        self._load_cache[creds_key] = (mtime_ns, credentials)
+        return credentials
+    
     def _delete_encrypted_credentials(self, brokerage_key: str):
         """Delete encrypted credentials file."""
         try:
+            self._load_cache.pop(brokerage_key.replace("-", "_"), None)
             creds_file = os.path.join('config', f'gmail_creds_{brokerage_key.replace("-", "_")}.enc')
             if os.path.exists(creds_file):
                 os.remove(creds_file)
@@ -476,5 +687,7 @@ class GmailAuthService:
             logger.error(f"Error deleting encrypted credentials: {e}")
 
 
-# Global instance for application use
-gmail_auth_service = GmailAuthService()
\ No newline at end of file
+@functools.lru_cache(maxsize=None)
+def get_gmail_auth_service() -> GmailAuthService:
+    """Return the shared GmailAuthService, creating it on first use."""
+    return GmailAuthService()
@@ -3,8 +3,11 @@ Automated Google Drive OAuth flow for Streamlit.
 Handles the complete OAuth process within the Streamlit app.
 """
 
+import functools
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import urllib.parse
 import json
 from typing import Optional, Dict, Any
@@ -12,38 +15,44 @@ from typing import Optional, Dict, Any
 class StreamlitGoogleDriveAuth:
     """Handles Google Drive OAuth flow within Streamlit app"""
     
+    _AUTH_URL_TEMPLATE = (
+        "https://accounts.google.com/o/oauth2/auth"
+        "?response_type=code&access_type=offline&prompt=consent"
+        "&client_id={client_id}&redirect_uri={redirect_uri}&scope={scope}"
+    )
+    
     def __init__(self):
         self.client_id = st.secrets.get("google", {}).get("client_id")
         self.client_secret = st.secrets.get("google", {}).get("client_secret")
         self.redirect_uri = "urn:ietf:wg:oauth:2.0:oob"
         self.scope = "https://www.googleapis.com/auth/drive.file"
+        self._session = None
         
+    @property
+    def session(self) -> requests.Session:
+        """Pooled HTTP session, created on first use"""
+        if self._session is None:
+            self._session = requests.Session()
+            retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+            self._session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry))
+        return self._session
+    
     def is_configured(self) -> bool:
         """Check if basic OAuth credentials are configured"""
         return bool(self.client_id and self.client_secret)
     
     def has_valid_tokens(self) -> bool:
         """Check if we have valid access/refresh tokens"""
-        try:
-            access_token = st.secrets["google"]["access_token"]
-            refresh_token = st.secrets["google"]["refresh_token"]
-            return bool(access_token and refresh_token)
-        except KeyError:
-            return False
+        google_secrets = st.secrets.get("google", {})
+        return bool(google_secrets.get("access_token") and google_secrets.get("refresh_token"))
     
     def get_auth_url(self) -> str:
         """Generate Google OAuth authorization URL"""
-        params = {
-            'client_id': self.client_id,
-            'redirect_uri': self.redirect_uri,
-            'scope': self.scope,
-            'response_type': 'code',
-            'access_type': 'offline',
-            'prompt': 'consent'
-        }
-        
-        base_url = "https://accounts.google.com/o/oauth2/auth"
-        return f"{base_url}?{urllib.parse.urlencode(params)}"
+        return self._AUTH_URL_TEMPLATE.format(
+            client_id=urllib.parse.quote(self.client_id, safe=''),
+            redirect_uri=urllib.parse.quote(self.redirect_uri, safe=''),
+            scope=urllib.parse.quote(self.scope, safe='')
+        )
     
     def exchange_code_for_tokens(self, auth_code: str) -> Optional[Dict[str, Any]]:
         """Exchange authorization code for access/refresh tokens"""
@@ -58,7 +67,7 @@ class StreamlitGoogleDriveAuth:
                 'redirect_uri': self.redirect_uri
             }
             
-            response = requests.post(token_url, data=data)
+            response = self.session.post(token_url, data=data)
             response.raise_for_status()
             
             tokens = response.json()
@@ -94,11 +103,12 @@ class StreamlitGoogleDriveAuth:
             st.success("✅ Google Drive authentication is already configured!")
             
             # Show current token status
+            google_secrets = st.secrets.get("google", {})
             with st.expander("Token Information"):
                 st.json({
                     "client_id": self.client_id,
-                    "has_access_token": bool(st.secrets.get("google", {}).get("access_token")),
-                    "has_refresh_token": bool(st.secrets.get("google", {}).get("refresh_token"))
+                    "has_access_token": bool(google_secrets.get("access_token")),
+                    "has_refresh_token": bool(google_secrets.get("refresh_token"))
                 })
             
             return True
@@ -158,5 +168,7 @@ refresh_token = "{tokens['refresh_token']}"
         
         return False
 
-# Global instance for easy import
-google_drive_auth = StreamlitGoogleDriveAuth()
\ No newline at end of file
+@functools.lru_cache(maxsize=None)
+def get_google_drive_auth() -> StreamlitGoogleDriveAuth:
+    """Return the shared StreamlitGoogleDriveAuth, creating it on first use"""
+    return StreamlitGoogleDriveAuth()
@@ -13,20 +13,57 @@ Features:
 """
 
 import os
-import json
+import functools
+import hmac
+import hashlib
 import logging
-from typing import Dict, Any, Optional, List
-from datetime import datetime, timedelta
+import time
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional, List
+from datetime import datetime
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from urllib.parse import urlencode
 import base64
 from dataclasses import dataclass
 
-from gmail_auth_service import GmailCredentials, gmail_auth_service
+from gmail_auth_service import GmailCredentials, decode_id_token_claims, get_gmail_auth_service
 
 logger = logging.getLogger(__name__)
 
+# Static admin setup instructions, built once and shared read-only
+_SETUP_INSTRUCTIONS = MappingProxyType({
+    'title': 'Universal Google Sign-In Setup',
+    'description': 'Configure a single Google OAuth2 client for all users',
+    'steps': (
+        '1. Create a Google Cloud Project',
+        '2. Enable Gmail API',
+        '3. Create OAuth2 Client ID (Web Application)',
+        '4. Add authorized redirect URIs',
+        '5. Add configuration to Streamlit secrets'
+    ),
+    'secrets_example': '''
+[google_signin]
+client_id = "your-universal-client-id.googleusercontent.com"
+client_secret = "your-universal-client-secret"
+redirect_uri = "https://your-app.streamlit.app/oauth/callback"
+            ''',
+    'benefits': (
+        '✅ Users can self-authenticate with their own Google accounts',
+        '✅ No per-brokerage OAuth2 setup required',
+        '✅ Simplified admin configuration',
+        '✅ Users control their own email access'
+    )
+})
+
+@functools.lru_cache(maxsize=None)
+def _read_google_signin_secrets() -> Mapping[str, Any]:
+    """Read the [google_signin] secrets section once per process as a read-only mapping."""
+    return MappingProxyType(dict(st.secrets.get("google_signin", {})))
+
+
 @dataclass 
 class GoogleSignInConfig:
     """Universal Google Sign-In configuration."""
@@ -45,9 +82,45 @@ class GoogleSignInAuth:
         'https://www.googleapis.com/auth/userinfo.profile'
     ]
     
+    _REQUIRED_CONFIG_FIELDS = frozenset(('client_id', 'client_secret', 'redirect_uri'))
+    
+    # Signed state parameters older than this are rejected in the callback
+    STATE_MAX_AGE_SECONDS = 600
+    _STATE_SIG_BYTES = 16
+    
     def __init__(self):
         """Initialize Google Sign-In authentication service."""
         self._config = self._load_universal_config()
+        self._signin_url_prefix = self._build_signin_url_prefix() if self._config else None
+        self._state_key = self._config.client_secret.encode() if self._config else None
+        self._session = self._create_session()
+    
+    def _build_signin_url_prefix(self) -> str:
+        """Encode the sign-in URL parameters that do not change between users once."""
+        params = {
+            'client_id': self._config.client_id,
+            'redirect_uri': self._config.redirect_uri,
+            'scope': ' '.join(self.REQUIRED_SCOPES),
+            'response_type': 'code',
+            'access_type': 'offline',  # Get refresh token
+            'prompt': 'consent',  # Force consent screen
+            'include_granted_scopes': 'true'
+        }
+        return f"https://accounts.google.com/o/oauth2/v2/auth?{urlencode(params)}"
+    
+    def _create_session(self) -> requests.Session:
+        """Create a pooled HTTP session shared by token exchange and userinfo calls."""
+        session = requests.Session()
+        # One pool per Google host; status retries stay off POST so authorization codes are never replayed
+        retry = Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=16, max_retries=retry)
+        session.mount('https://oauth2.googleapis.com', adapter)
+        session.mount('https://www.googleapis.com', adapter)
+        return session
+    
+    def close(self):
+        """Close pooled HTTP connections."""
+        self._session.close()
     
     def _load_universal_config(self) -> Optional[GoogleSignInConfig]:
         """
@@ -58,17 +131,15 @@ class GoogleSignInAuth:
         """
         try:
             # Check for universal Google OAuth2 configuration
-            google_signin = st.secrets.get("google_signin", {})
+            google_signin = _read_google_signin_secrets()
             
             if not google_signin:
                 logger.info("No universal Google Sign-In configuration found")
                 return None
             
-            required_fields = ['client_id', 'client_secret', 'redirect_uri']
-            missing_fields = [field for field in required_fields if field not in google_signin]
-            
-            if missing_fields:
-                logger.error(f"Missing Google Sign-In config fields: {missing_fields}")
+            if not self._REQUIRED_CONFIG_FIELDS.issubset(google_signin.keys()):
+                missing_fields = sorted(self._REQUIRED_CONFIG_FIELDS.difference(google_signin.keys()))
+                logger.error("Missing Google Sign-In config fields: %s", missing_fields)
                 return None
             
             return GoogleSignInConfig(
@@ -78,7 +149,7 @@ class GoogleSignInAuth:
             )
             
         except Exception as e:
-            logger.error(f"Error loading Google Sign-In config: {e}")
+            logger.error("Error loading Google Sign-In config: %s", e)
             return None
     
     def is_configured(self) -> bool:
@@ -100,34 +171,19 @@ class GoogleSignInAuth:
             if not self._config:
                 return None
             
-            # Create state parameter with brokerage info for security
-            state_data = {
-                'brokerage_key': brokerage_key,
-                'timestamp': datetime.now().isoformat(),
-                'type': 'email_automation_setup'
-            }
-            state = base64.urlsafe_b64encode(json.dumps(state_data).encode()).decode()
-            
-            params = {
-                'client_id': self._config.client_id,
-                'redirect_uri': self._config.redirect_uri,
-                'scope': ' '.join(self.REQUIRED_SCOPES),
-                'response_type': 'code',
-                'access_type': 'offline',  # Get refresh token
-                'prompt': 'consent',  # Force consent screen
-                'include_granted_scopes': 'true',
-                'state': state
-            }
+            # Create signed state parameter with brokerage info for security
+            state = self._sign_state(brokerage_key)
             
+            params = {'state': state}
             if user_hint:
                 params['login_hint'] = user_hint
             
-            signin_url = f"https://accounts.google.com/o/oauth2/v2/auth?{urlencode(params)}"
-            logger.info(f"Generated Google Sign-In URL for {brokerage_key}")
+            signin_url = f"{self._signin_url_prefix}&{urlencode(params)}"
+            logger.info("Generated Google Sign-In URL for %s", brokerage_key)
             return signin_url
             
         except Exception as e:
-            logger.error(f"Error generating Sign-In URL: {e}")
+            logger.error("Error generating Sign-In URL: %s", e)
             return None
     
     def handle_signin_callback(self, authorization_code: str, state: str) -> Optional[Dict[str, Any]]:
@@ -146,17 +202,8 @@ class GoogleSignInAuth:
                 return None
             
             # Decode and validate state
-            try:
-                state_data = json.loads(base64.urlsafe_b64decode(state.encode()).decode())
-                brokerage_key = state_data['brokerage_key']
-                
-                # Basic state validation
-                if state_data.get('type') != 'email_automation_setup':
-                    logger.error("Invalid state type in callback")
-                    return None
-                    
-            except Exception as e:
-                logger.error(f"Invalid state parameter: {e}")
+            brokerage_key = self._verify_state(state)
+            if brokerage_key is None:
                 return None
             
             # Exchange code for tokens
@@ -169,16 +216,18 @@ class GoogleSignInAuth:
                 'redirect_uri': self._config.redirect_uri
             }
             
-            response = requests.post(token_url, data=data)
+            response = self._session.post(token_url, data=data, timeout=10)
             response.raise_for_status()
             token_data = response.json()
             
-            # Get user info
-            user_info = self._get_user_info(token_data['access_token'])
+            # Get user info; the id_token already carries email, name and picture for these scopes
+            user_info = decode_id_token_claims(token_data.get('id_token'))
+            if not user_info.get('email'):
+                user_info = self._get_user_info(token_data['access_token'])
             
             # Calculate token expiry
             expires_in = token_data.get('expires_in', 3600)
-            token_expiry = datetime.now() + timedelta(seconds=expires_in)
+            token_expiry = datetime.fromtimestamp(time.time() + expires_in)
             
             # Create credentials
             credentials = GmailCredentials(
@@ -191,7 +240,7 @@ class GoogleSignInAuth:
             )
             
             # Store credentials for the brokerage
-            gmail_auth_service.store_credentials(brokerage_key, credentials)
+            get_gmail_auth_service().store_credentials(brokerage_key, credentials)
             
             return {
                 'success': True,
@@ -203,7 +252,7 @@ class GoogleSignInAuth:
             }
             
         except Exception as e:
-            logger.error(f"Error handling Sign-In callback: {e}")
+            logger.error("Error handling Sign-In callback: %s", e)
             return None
     
     def authenticate_user_for_brokerage(self, brokerage_key: str, user_email: str = None) -> Dict[str, Any]:
@@ -226,7 +275,7 @@ class GoogleSignInAuth:
                 }
             
             # Check if user is already authenticated for this brokerage
-            existing_creds = gmail_auth_service.get_credentials(brokerage_key)
+            existing_creds = get_gmail_auth_service().get_credentials(brokerage_key)
             if existing_creds:
                 return {
                     'success': True,
@@ -251,7 +300,7 @@ class GoogleSignInAuth:
             }
             
         except Exception as e:
-            logger.error(f"Error starting authentication for {brokerage_key}: {e}")
+            logger.error("Error starting authentication for %s: %s", brokerage_key, e)
             return {
                 'success': False,
                 'message': f'Authentication error: {str(e)}'
@@ -277,17 +326,14 @@ class GoogleSignInAuth:
                     'message': 'Authentication failed'
                 }
             
-            return {
-                'success': True,
-                'message': f'Successfully authenticated as {result["user_email"]}',
-                'brokerage_key': result['brokerage_key'],
-                'user_email': result['user_email'],
-                'user_name': result.get('user_name', ''),
-                'ready_for_automation': True
-            }
+            # Reshape the callback result in place; credentials stay with the auth service
+            result.pop('credentials', None)
+            result['message'] = f'Successfully authenticated as {result["user_email"]}'
+            result['ready_for_automation'] = True
+            return result
             
         except Exception as e:
-            logger.error(f"Error completing authentication: {e}")
+            logger.error("Error completing authentication: %s", e)
             return {
                 'success': False,
                 'message': f'Authentication completion failed: {str(e)}'
@@ -304,11 +350,11 @@ class GoogleSignInAuth:
             User email or None if not authenticated
         """
         try:
-            credentials = gmail_auth_service.get_credentials(brokerage_key)
+            credentials = get_gmail_auth_service().get_credentials(brokerage_key)
             return credentials.email if credentials else None
             
         except Exception as e:
-            logger.error(f"Error getting user email for {brokerage_key}: {e}")
+            logger.error("Error getting user email for %s: %s", brokerage_key, e)
             return None
     
     def disconnect_user_from_brokerage(self, brokerage_key: str) -> bool:
@@ -322,53 +368,68 @@ class GoogleSignInAuth:
             True if disconnection successful
         """
         try:
-            return gmail_auth_service.revoke_credentials(brokerage_key)
+            return get_gmail_auth_service().revoke_credentials(brokerage_key)
             
         except Exception as e:
-            logger.error(f"Error disconnecting user from {brokerage_key}: {e}")
+            logger.error("Error disconnecting user from %s: %s", brokerage_key, e)
             return False
     
+    def _sign_state(self, brokerage_key: str) -> str:
+        """Build a compact `brokerage_key|timestamp` state tagged with an HMAC-SHA256."""
+        payload = f"{brokerage_key}|{int(time.time())}".encode()
+        sig = hmac.new(self._state_key, payload, hashlib.sha256).digest()[:self._STATE_SIG_BYTES]
+        return base64.urlsafe_b64encode(payload + b"." + sig).decode().rstrip("=")
+    
+    def _verify_state(self, state: str) -> Optional[str]:
+        """
+        Validate a state parameter produced by _sign_state.
+        
+        Args:
+            state: State parameter from the OAuth2 callback
+            
+        Returns:
+            The brokerage key, or None if the state is malformed, forged or expired
+        """
+        try:
+            raw = base64.urlsafe_b64decode(state + '=' * (-len(state) % 4))
+            payload, sig = raw[:-self._STATE_SIG_BYTES - 1], raw[-self._STATE_SIG_BYTES:]
+            expected = hmac.new(self._state_key, payload, hashlib.sha256).digest()[:self._STATE_SIG_BYTES]
+            if raw[-self._STATE_SIG_BYTES - 1:-self._STATE_SIG_BYTES] != b"." or not hmac.compare_digest(sig, expected):
+                logger.error("Invalid state signature in callback")
+                return None
+            
+            brokerage_key, timestamp = payload.decode().rsplit('|', 1)
+            if time.time() - int(timestamp) > self.STATE_MAX_AGE_SECONDS:
+                logger.error("Expired state parameter in callback")
+                return None
+            return brokerage_key
+            
+        except Exception as e:
+            logger.error("Invalid state parameter: %s", e)
+            return None
+    
     def _get_user_info(self, access_token: str) -> Dict[str, Any]:
         """Get user information from Google API."""
         try:
             headers = {'Authorization': f'Bearer {access_token}'}
-            response = requests.get(
+            response = self._session.get(
                 'https://www.googleapis.com/oauth2/v2/userinfo',
-                headers=headers
+                headers=headers,
+                timeout=10
             )
             response.raise_for_status()
             return response.json()
             
-        except Exception as e:
-            logger.error(f"Error getting user info: {e}")
+        except (requests.RequestException, ValueError) as e:
+            logger.error("Error getting user info: %s", e)
             return {}
     
-    def get_setup_instructions(self) -> Dict[str, str]:
+    def get_setup_instructions(self) -> Mapping[str, Any]:
         """Get setup instructions for universal Google Sign-In."""
-        return {
-            'title': 'Universal Google Sign-In Setup',
-            'description': 'Configure a single Google OAuth2 client for all users',
-            'steps': [
-                '1. Create a Google Cloud Project',
-                '2. Enable Gmail API',  
-                '3. Create OAuth2 Client ID (Web Application)',
-                '4. Add authorized redirect URIs',
-                '5. Add configuration to Streamlit secrets'
-            ],
-            'secrets_example': '''
-[google_signin]
-client_id = "your-universal-client-id.googleusercontent.com"
-client_secret = "your-universal-client-secret"
-redirect_uri = "https://your-app.streamlit.app/oauth/callback"
-            ''',
-            'benefits': [
-                '✅ Users can self-authenticate with their own Google accounts',
-                '✅ No per-brokerage OAuth2 setup required',
-                '✅ Simplified admin configuration',
-                '✅ Users control their own email access'
-            ]
-        }
+        return _SETUP_INSTRUCTIONS
 
 
-# Global instance for application use
-google_signin_auth = GoogleSignInAuth()
\ No newline at end of file
+@functools.lru_cache(maxsize=None)
+def get_google_signin_auth() -> GoogleSignInAuth:
+    """Return the shared GoogleSignInAuth, creating it on first use."""
+    return GoogleSignInAuth()
@@ -8,10 +8,24 @@ including sign-in buttons, authentication status, and callback handling.
 import streamlit as st
 import logging
 from typing import Dict, Any, Optional
-from google_signin_auth import google_signin_auth
+from google_signin_auth import get_google_signin_auth
 
 logger = logging.getLogger(__name__)
 
+# Prominent link button to the Google Sign-In page; only the URL varies per render
+_SIGNIN_BUTTON_HTML = (
+    '<a href="{url}" target="_blank" style="'
+    'display: inline-block; '
+    'background-color: #4285f4; '
+    'color: white; '
+    'padding: 12px 24px; '
+    'text-decoration: none; '
+    'border-radius: 8px; '
+    'font-weight: bold; '
+    'margin: 10px 0;'
+    '">🔗 Open Google Sign-In</a>'
+)
+
 class GoogleSignInUI:
     """Google Sign-In UI component manager."""
     
@@ -29,30 +43,26 @@ class GoogleSignInUI:
         """
         try:
             # Check if universal Google Sign-In is configured
-            if not google_signin_auth.is_configured():
+            if not get_google_signin_auth().is_configured():
                 st.error("🔧 **Universal Google Sign-In Not Configured**")
                 
                 with st.expander("Admin Setup Instructions"):
-                    instructions = google_signin_auth.get_setup_instructions()
+                    instructions = get_google_signin_auth().get_setup_instructions()
                     
                     st.markdown(f"### {instructions['title']}")
                     st.info(instructions['description'])
                     
-                    st.markdown("**Setup Steps:**")
-                    for step in instructions['steps']:
-                        st.markdown(f"- {step}")
+                    st.markdown("**Setup Steps:**\n" + "".join(f"\n- {step}" for step in instructions['steps']))
                     
                     st.markdown("**Streamlit Secrets Configuration:**")
                     st.code(instructions['secrets_example'], language='toml')
                     
-                    st.markdown("**Benefits:**")
-                    for benefit in instructions['benefits']:
-                        st.markdown(f"- {benefit}")
+                    st.markdown("**Benefits:**\n" + "".join(f"\n- {benefit}" for benefit in instructions['benefits']))
                 
                 return {'success': False, 'message': 'Configuration required'}
             
             # Check current authentication status
-            existing_email = google_signin_auth.get_user_email_for_brokerage(brokerage_key)
+            existing_email = get_google_signin_auth().get_user_email_for_brokerage(brokerage_key)
             
             if existing_email:
                 # User is already authenticated
@@ -63,7 +73,8 @@ class GoogleSignInUI:
                 with col1:
                     if st.button("🔍 Test Gmail Connection", key=f"test_{brokerage_key}"):
                         with st.spinner("Testing connection..."):
-                            test_result = gmail_auth_service.test_credentials(brokerage_key)
+                            from gmail_auth_service import get_gmail_auth_service
+                            test_result = get_gmail_auth_service().test_credentials(brokerage_key)
                             if test_result['success']:
                                 st.success(f"✅ {test_result['message']}")
                                 if 'total_messages' in test_result:
@@ -73,7 +84,7 @@ class GoogleSignInUI:
                 
                 with col2:
                     if st.button("🔓 Sign Out", key=f"signout_{brokerage_key}"):
-                        if google_signin_auth.disconnect_user_from_brokerage(brokerage_key):
+                        if get_google_signin_auth().disconnect_user_from_brokerage(brokerage_key):
                             st.success("Signed out successfully")
                             st.rerun()
                         else:
@@ -102,7 +113,7 @@ class GoogleSignInUI:
                 
                 # Sign-In button
                 if st.button("🔐 **Sign in with Google**", type="primary", key=f"signin_{brokerage_key}"):
-                    auth_result = google_signin_auth.authenticate_user_for_brokerage(
+                    auth_result = get_google_signin_auth().authenticate_user_for_brokerage(
                         brokerage_key, user_email_hint
                     )
                     
@@ -112,23 +123,11 @@ class GoogleSignInUI:
                             st.rerun()
                         else:
                             # Show authentication URL
-                            st.markdown("### 🔐 **Complete Authentication**")
-                            st.markdown("**Step 1:** Click the link below to sign in with Google:")
+                            st.markdown("### 🔐 **Complete Authentication**\n\n**Step 1:** Click the link below to sign in with Google:")
                             
                             # Create a prominent link button
                             signin_url = auth_result['signin_url']
-                            st.markdown(f"""
-                            <a href="{signin_url}" target="_blank" style="
-                                display: inline-block;
-                                background-color: #4285f4;
-                                color: white;
-                                padding: 12px 24px;
-                                text-decoration: none;
-                                border-radius: 8px;
-                                font-weight: bold;
-                                margin: 10px 0;
-                            ">🔗 Open Google Sign-In</a>
-                            """, unsafe_allow_html=True)
+                            st.markdown(_SIGNIN_BUTTON_HTML.format(url=signin_url), unsafe_allow_html=True)
                             
                             st.markdown("**Step 2:** After signing in, you'll get a code. Enter it below:")
                             
@@ -175,7 +174,7 @@ class GoogleSignInUI:
             Status dictionary
         """
         try:
-            user_email = google_signin_auth.get_user_email_for_brokerage(brokerage_key)
+            user_email = get_google_signin_auth().get_user_email_for_brokerage(brokerage_key)
             
             if user_email:
                 st.success(f"📧 **Gmail Connected:** {user_email}")
@@ -212,11 +211,9 @@ class GoogleSignInUI:
             Setup result dictionary
         """
         try:
-            st.markdown("### 📧 **Email Automation Setup**")
-            
             # Step 1: Authentication
             with st.container():
-                st.markdown("#### Step 1: Google Authentication")
+                st.markdown("### 📧 **Email Automation Setup**\n\n#### Step 1: Google Authentication")
                 auth_result = GoogleSignInUI.render_signin_button(brokerage_key)
                 
                 if not auth_result['success'] or not auth_result.get('authenticated'):
@@ -288,22 +285,8 @@ class GoogleSignInUI:
                 with col1:
                     if st.button("💾 **Save Configuration**", type="primary", key=f"save_config_{brokerage_key}"):
                         # Save email automation configuration
-                        config = {
-                            'sender_filter': sender_filter,
-                            'subject_filter': subject_filter,
-                            'auto_add_tracking': auto_add_tracking,
-                            'auto_send_email': auto_send_email,
-                            'email_recipient': email_recipient,
-                            'auto_output_format': auto_output_format,
-                            'active': False  # Start as inactive
-                        }
-                        
-                        # Store configuration
-                        if 'brokerage_email_configs' not in st.session_state:
-                            st.session_state.brokerage_email_configs = {}
-                        
                         user_email = auth_result.get('user_email')
-                        st.session_state.brokerage_email_configs[brokerage_key] = {
+                        st.session_state.setdefault('brokerage_email_configs', {})[brokerage_key] = {
                             'gmail_credentials': {'email': user_email},
                             'gmail_authenticated': True,
                             'inbox_filters': {
@@ -328,8 +311,8 @@ class GoogleSignInUI:
                     if st.button("🔄 **Test Email Connection**", key=f"test_email_{brokerage_key}"):
                         with st.spinner("Testing Gmail connection..."):
                             # Import here to avoid circular dependency
-                            from gmail_auth_service import gmail_auth_service
-                            test_result = gmail_auth_service.test_credentials(brokerage_key)
+                            from gmail_auth_service import get_gmail_auth_service
+                            test_result = get_gmail_auth_service().test_credentials(brokerage_key)
                             
                             if test_result['success']:
                                 st.success(f"✅ {test_result['message']}")
@@ -1,15 +1,30 @@
 """Load ID mapper for retrieving internal load IDs from GoAugment API."""
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+from urllib3.util.retry import Retry
 import streamlit as st
-from typing import Dict, Any, List, Optional, Tuple
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
 import logging
 from dataclasses import dataclass
-import time
 import re
+from urllib.parse import quote
+from collections import Counter
 
 logger = logging.getLogger(__name__)
 
+# Failure statuses reported individually by get_mapping_summary; any other non-success is 'other_error'
+SUMMARY_STATUSES = ('not_found', 'load_processing_failed', 'auth_failed', 'timeout', 'connection_error')
+
+# CSV columns that may already carry a PRO number, in priority order
+CSV_PRO_FIELDS = ('PRO', 'pro_number', 'ProNumber', 'tracking_number', 'carrier_pro')
+
+# Reference number names treated as PRO numbers (pro, pro_num, pro_number, carrier_pro, tracking_number, ...)
+PRO_REFERENCE_NAME_PATTERN = re.compile(r'pro|tracking_number', re.IGNORECASE)
+
 
 @dataclass
 class LoadProcessingResult:
@@ -21,6 +36,16 @@ class LoadProcessingResult:
     response_data: Optional[Dict] = None
 
 
+class LoadLookupResult(NamedTuple):
+    """Outcome of a single Load API lookup."""
+    internal_load_id: Optional[str]
+    status: str
+    error_message: Optional[str] = None
+    pro_number: Optional[str] = None
+    carrier_name: Optional[str] = None
+    load_details: Optional[Dict[str, Any]] = None
+
+
 @dataclass
 class LoadIDMapping:
     """Mapping between CSV row and internal load ID."""
@@ -56,15 +81,42 @@ class LoadIDMapper:
         self.api_key = credentials.get('api_key')
         # Always use the correct Load API endpoint, regardless of what credentials provide
         self.base_url = 'https://load.prod.goaugment.com/unstable/loads'
+        self._load_url_prefix = f"{self.base_url}/brokerage-key/{quote(self.brokerage_key, safe='')}/brokerage-load-id/"
         self.timeout = credentials.get('timeout', 30)
         self.retry_count = credentials.get('retry_count', 3)
         self.retry_delay = credentials.get('retry_delay', 1)
+        self.max_workers = credentials.get('max_workers', 16)
+        
+        # Pooled session shared by the concurrent load lookups
+        self.session = requests.Session()
+        retry = Retry(
+            total=max(self.retry_count - 1, 0),
+            backoff_factor=self.retry_delay,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=max(self.max_workers, 32), max_retries=retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # Deterministic lookup results keyed by (brokerage_key, load_number), plus in-flight
+        # lookups so duplicate load numbers in a batch share one API call
+        self._lookup_cache: Dict[Tuple[str, str], LoadLookupResult] = {}
+        self._lookup_cache_max = credentials.get('lookup_cache_max', 4096)
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        self._cache_lock = threading.Lock()
+        self._auth_headers: Optional[Dict[str, str]] = None
+        self._events_headers = {
+            'Content-Type': 'application/json',
+            'Authorization': f'Bearer {self.api_key}'
+        }
         
         # Debug logging to confirm correct endpoint
-        logger.info(f"🔍 DEBUG: Load ID Mapper using base URL: {self.base_url}")
+        logger.debug("Load ID Mapper using base URL: %s", self.base_url)
         
         if not self.api_key:
-            logger.warning(f"No API credentials available for brokerage: {brokerage_key}")
+            logger.warning("No API credentials available for brokerage: %s", brokerage_key)
     
     # Keep legacy constructor for backward compatibility
     @classmethod
@@ -80,163 +132,158 @@ class LoadIDMapper:
         }
         return cls(brokerage_key, credentials)
         
+    def close(self):
+        """Close pooled HTTP connections."""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
     def get_auth_headers(self) -> Dict[str, str]:
         """
         Get authentication headers with comprehensive debugging.
         """
         headers = {'Content-Type': 'application/json'}
         
-        # COMPREHENSIVE DEBUG LOGGING
-        logger.info("🔍 DEBUG: Starting Load ID Mapper authentication analysis")
+        # Detailed diagnostics are logged at DEBUG level; failures raise with a summary
+        logger.debug("Resolving Load API auth headers from st.secrets")
         
         try:
             # Step 1: Test Streamlit import and basic access
-            logger.info(f"🔍 DEBUG: Streamlit module available: {st is not None}")
-            logger.info(f"🔍 DEBUG: hasattr(st, 'secrets'): {hasattr(st, 'secrets')}")
-            
             if not hasattr(st, 'secrets'):
-                logger.error("❌ DEBUG: st.secrets attribute not available")
-                raise Exception("DEBUG: Streamlit secrets not available - check cloud deployment configuration")
+                raise Exception("Streamlit secrets not available - check cloud deployment configuration")
             
             # Step 2: Test secrets object accessibility
             try:
                 secrets_obj = st.secrets
-                logger.info(f"🔍 DEBUG: st.secrets object type: {type(secrets_obj)}")
-                logger.info(f"🔍 DEBUG: st.secrets object exists: {secrets_obj is not None}")
+                logger.debug("st.secrets object type: %s", type(secrets_obj))
             except Exception as secrets_error:
-                logger.error(f"❌ DEBUG: Error accessing st.secrets object: {secrets_error}")
-                raise Exception(f"DEBUG: Cannot access st.secrets object: {secrets_error}")
+                raise Exception(f"Cannot access st.secrets object: {secrets_error}")
             
             # Step 3: Test secrets conversion to dict
             try:
                 secrets_dict = dict(st.secrets)
                 available_sections = list(secrets_dict.keys())
-                logger.info(f"🔍 DEBUG: Available secrets sections: {available_sections}")
-                logger.info(f"🔍 DEBUG: Total sections found: {len(available_sections)}")
+                logger.debug("Available secrets sections: %s", available_sections)
             except Exception as dict_error:
-                logger.error(f"❌ DEBUG: Error converting secrets to dict: {dict_error}")
+                logger.debug("Error converting secrets to dict: %s", dict_error)
                 available_sections = ["DICT_CONVERSION_FAILED"]
             
             # Step 4: Test load_api section access
-            logger.info("🔍 DEBUG: Testing load_api section access...")
-            
             # Method 1: Dictionary membership test
             try:
                 load_api_in_dict = 'load_api' in st.secrets
-                logger.info(f"🔍 DEBUG: 'load_api' in st.secrets (dict method): {load_api_in_dict}")
+                logger.debug("'load_api' in st.secrets: %s", load_api_in_dict)
             except Exception as dict_test_error:
-                logger.error(f"❌ DEBUG: Dictionary membership test failed: {dict_test_error}")
+                logger.debug("Dictionary membership test failed: %s", dict_test_error)
                 load_api_in_dict = False
             
             # Method 2: hasattr test
             try:
                 load_api_hasattr = hasattr(st.secrets, 'load_api')
-                logger.info(f"🔍 DEBUG: hasattr(st.secrets, 'load_api'): {load_api_hasattr}")
+                logger.debug("hasattr(st.secrets, 'load_api'): %s", load_api_hasattr)
             except Exception as hasattr_error:
-                logger.error(f"❌ DEBUG: hasattr test failed: {hasattr_error}")
+                logger.debug("hasattr test failed: %s", hasattr_error)
                 load_api_hasattr = False
             
             # Step 5: If section missing, provide detailed diagnosis
             if not load_api_in_dict and not load_api_hasattr:
-                logger.error(f"❌ DEBUG: load_api section not found")
-                logger.error(f"❌ DEBUG: Available sections: {available_sections}")
-                
                 # Check for similar section names
-                similar_sections = [s for s in available_sections if 'load' in s.lower() or 'api' in s.lower()]
-                if similar_sections:
-                    logger.error(f"❌ DEBUG: Similar sections found: {similar_sections}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    similar_sections = [s for s in available_sections if 'load' in s.lower() or 'api' in s.lower()]
+                    if similar_sections:
+                        logger.debug("Similar sections found: %s", similar_sections)
                 
-                raise Exception(f"DEBUG: Missing [load_api] section. Available sections: {available_sections}")
+                raise Exception(f"Missing [load_api] section. Available sections: {available_sections}")
             
             # Step 6: Access load_api section
-            logger.info("🔍 DEBUG: Accessing load_api section...")
             try:
                 load_secrets = st.secrets.load_api
-                logger.info(f"🔍 DEBUG: load_secrets object type: {type(load_secrets)}")
-                logger.info(f"🔍 DEBUG: load_secrets object exists: {load_secrets is not None}")
+                logger.debug("load_api section type: %s", type(load_secrets))
             except Exception as section_error:
-                logger.error(f"❌ DEBUG: Error accessing load_api section: {section_error}")
-                raise Exception(f"DEBUG: Cannot access load_api section: {section_error}")
+                raise Exception(f"Cannot access load_api section: {section_error}")
             
             # Step 7: Test bearer_token access
-            logger.info("🔍 DEBUG: Testing bearer_token access...")
             try:
                 has_bearer_token = hasattr(load_secrets, 'bearer_token')
-                logger.info(f"🔍 DEBUG: hasattr(load_secrets, 'bearer_token'): {has_bearer_token}")
+                logger.debug("hasattr(load_secrets, 'bearer_token'): %s", has_bearer_token)
                 
                 if has_bearer_token:
                     bearer_token_raw = load_secrets.bearer_token
-                    logger.info(f"🔍 DEBUG: bearer_token raw type: {type(bearer_token_raw)}")
-                    logger.info(f"🔍 DEBUG: bearer_token raw value exists: {bearer_token_raw is not None}")
-                    logger.info(f"🔍 DEBUG: bearer_token raw length: {len(str(bearer_token_raw)) if bearer_token_raw else 0}")
+                    logger.debug("bearer_token raw type: %s", type(bearer_token_raw))
                     
                     if bearer_token_raw:
                         bearer_token = str(bearer_token_raw).strip()
-                        logger.info(f"🔍 DEBUG: bearer_token after processing length: {len(bearer_token)}")
-                        logger.info(f"🔍 DEBUG: bearer_token preview: {bearer_token[:10]}...{bearer_token[-4:] if len(bearer_token) > 14 else bearer_token}")
+                        logger.debug("bearer_token length after processing: %d", len(bearer_token))
                         
                         if bearer_token:
                             headers['Authorization'] = f'Bearer {bearer_token}'
-                            logger.info("✅ DEBUG: Successfully set Authorization header with bearer_token")
+                            logger.debug("Authorization header set from bearer_token")
                             return headers
                         else:
-                            logger.error("❌ DEBUG: bearer_token is empty after processing")
+                            logger.debug("bearer_token is empty after processing")
                     else:
-                        logger.error("❌ DEBUG: bearer_token raw value is None/empty")
+                        logger.debug("bearer_token raw value is None/empty")
             except Exception as bearer_error:
-                logger.error(f"❌ DEBUG: Error accessing bearer_token: {bearer_error}")
+                logger.debug("Error accessing bearer_token: %s", bearer_error)
             
             # Step 8: Test api_key access
-            logger.info("🔍 DEBUG: Testing api_key access...")
             try:
                 has_api_key = hasattr(load_secrets, 'api_key')
-                logger.info(f"🔍 DEBUG: hasattr(load_secrets, 'api_key'): {has_api_key}")
+                logger.debug("hasattr(load_secrets, 'api_key'): %s", has_api_key)
                 
                 if has_api_key:
                     api_key_raw = load_secrets.api_key
-                    logger.info(f"🔍 DEBUG: api_key raw type: {type(api_key_raw)}")
-                    logger.info(f"🔍 DEBUG: api_key raw value exists: {api_key_raw is not None}")
-                    logger.info(f"🔍 DEBUG: api_key raw length: {len(str(api_key_raw)) if api_key_raw else 0}")
+                    logger.debug("api_key raw type: %s", type(api_key_raw))
                     
                     if api_key_raw:
                         api_key = str(api_key_raw).strip()
-                        logger.info(f"🔍 DEBUG: api_key after processing length: {len(api_key)}")
-                        logger.info(f"🔍 DEBUG: api_key preview: {api_key[:10]}...{api_key[-4:] if len(api_key) > 14 else api_key}")
+                        logger.debug("api_key length after processing: %d", len(api_key))
                         
                         if api_key:
                             headers['Authorization'] = f'Bearer {api_key}'
-                            logger.info("✅ DEBUG: Successfully set Authorization header with api_key")
+                            logger.debug("Authorization header set from api_key")
                             return headers
                         else:
-                            logger.error("❌ DEBUG: api_key is empty after processing")
+                            logger.debug("api_key is empty after processing")
                     else:
-                        logger.error("❌ DEBUG: api_key raw value is None/empty")
+                        logger.debug("api_key raw value is None/empty")
             except Exception as api_key_error:
-                logger.error(f"❌ DEBUG: Error accessing api_key: {api_key_error}")
+                logger.debug("Error accessing api_key: %s", api_key_error)
             
             # Step 9: Final failure analysis
-            logger.error("❌ DEBUG: No valid authentication credentials found")
             available_keys = []
             try:
                 if hasattr(load_secrets, 'bearer_token'):
                     available_keys.append('bearer_token')
                 if hasattr(load_secrets, 'api_key'):
                     available_keys.append('api_key')
-                logger.error(f"❌ DEBUG: Available keys in load_api section: {available_keys}")
             except:
-                logger.error("❌ DEBUG: Cannot enumerate keys in load_api section")
+                logger.debug("Cannot enumerate keys in load_api section")
             
-            raise Exception(f"DEBUG: No valid credentials in load_api section. Available keys: {available_keys}")
+            raise Exception(f"No valid credentials in load_api section. Available keys: {available_keys}")
                 
         except Exception as e:
-            logger.error(f"❌ DEBUG: Load ID Mapper authentication failed with: {type(e).__name__}: {e}")
-            logger.error("❌ DEBUG: This detailed error information should help identify the root cause")
-            raise Exception(f"Load API authentication debug error: {e}")
+            logger.error("Load API authentication failed: %s: %s", type(e).__name__, e)
+            raise Exception(f"Load API authentication error: {e}")
         
         return headers
     
     # Debug version with comprehensive logging - fallback authentication removed for debugging
     
+    def _get_cached_auth_headers(self) -> Dict[str, str]:
+        """
+        Resolve auth headers on first use and reuse them for every later request.
+        
+        Failures are not cached, so a fixed secrets configuration is picked up on the next call.
+        """
+        if self._auth_headers is None:
+            self._auth_headers = self.get_auth_headers()
+        return self._auth_headers
+    
     def map_load_ids(self, processing_results: List[LoadProcessingResult], csv_rows: List[Dict[str, Any]] = None) -> List[LoadIDMapping]:
         """
         Map CSV load numbers to internal load IDs via API calls with enhanced PRO extraction.
@@ -248,39 +295,84 @@ class LoadIDMapper:
         Returns:
             List of LoadIDMapping objects with enhanced workflow data
         """
-        mappings = []
-        csv_lookup = {}
-        
         # Create lookup for CSV rows by index
-        if csv_rows:
-            for i, row in enumerate(csv_rows):
-                csv_lookup[i] = row
-        
-        for result in processing_results:
-            if result.success and result.load_number:
-                # Get corresponding CSV row for this result
-                csv_row = csv_lookup.get(result.csv_row_index, {})
-                csv_row['_row_index'] = result.csv_row_index  # Add index for tracking
-                
-                # Use enhanced workflow
-                mapping = self._fetch_internal_load_id_enhanced(result.load_number, csv_row)
-                mappings.append(mapping)
-                
-            else:
-                # Load processing failed, create mapping without internal ID
-                mapping = LoadIDMapping(
-                    csv_row_index=result.csv_row_index,
-                    load_number=result.load_number,
-                    internal_load_id=None,
-                    api_status='load_processing_failed',
-                    error_message=result.error_message,
-                    workflow_path='load_processing_failed'
-                )
-                mappings.append(mapping)
-        
-        return mappings
+        csv_lookup = dict(enumerate(csv_rows)) if csv_rows else {}
+        processed = [result for result in processing_results if result.success and result.load_number]
+        
+        # Run the enhanced workflow for all loads concurrently; the API round trips dominate
+        fetched = []
+        if processed:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(processed))) as executor:
+                fetched = list(executor.map(lambda result: self._map_processed_load(result, csv_lookup), processed))
+        
+        # Fetched mappings come back in processing order, so interleave them with the failures
+        fetched = iter(fetched)
+        return [
+            next(fetched) if result.success and result.load_number else LoadIDMapping(
+                csv_row_index=result.csv_row_index,
+                load_number=result.load_number,
+                internal_load_id=None,
+                api_status='load_processing_failed',
+                error_message=result.error_message,
+                workflow_path='load_processing_failed'
+            )
+            for result in processing_results
+        ]
     
-    def _fetch_internal_load_id(self, load_number: str, csv_row: Dict[str, Any] = None) -> tuple[Optional[str], str, Optional[str], Optional[str], Optional[str], Optional[Dict]]:
+    def _map_processed_load(self, result: LoadProcessingResult, csv_lookup: Dict[int, Dict[str, Any]]) -> LoadIDMapping:
+        """Run the enhanced workflow for a successfully processed load."""
+        # Get corresponding CSV row for this result
+        csv_row = csv_lookup.get(result.csv_row_index, {})
+        csv_row['_row_index'] = result.csv_row_index  # Add index for tracking
+        return self._fetch_internal_load_id_enhanced(result.load_number, csv_row)
+    
+    # Lookup outcomes that will not change on retry and are safe to reuse
+    CACHEABLE_STATUSES = frozenset(('success', 'no_id_in_response', 'not_found'))
+    
+    def _fetch_internal_load_id(self, load_number: str, csv_row: Dict[str, Any] = None) -> LoadLookupResult:
+        """
+        Fetch internal load ID, reusing earlier and in-flight lookups of the same load number.
+        
+        Args:
+            load_number: The brokerage load number (e.g., CSVTEST75279)
+            csv_row: Original CSV row data for PRO workflow determination
+            
+        Returns:
+            LoadLookupResult with the internal load ID, status, error and basic load details
+        """
+        cache_key = (self.brokerage_key, load_number)
+        
+        # Check cache first, then join any in-flight request for the same key
+        with self._cache_lock:
+            cached = self._lookup_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            future = self._inflight.get(cache_key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._inflight[cache_key] = future
+        
+        if not is_owner:
+            return future.result()
+        
+        try:
+            result = self._request_internal_load_id(load_number, csv_row)
+            if result.status in self.CACHEABLE_STATUSES:
+                with self._cache_lock:
+                    if len(self._lookup_cache) >= self._lookup_cache_max:
+                        self._lookup_cache.pop(next(iter(self._lookup_cache)))
+                    self._lookup_cache[cache_key] = result
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._cache_lock:
+                self._inflight.pop(cache_key, None)
+    
+    def _request_internal_load_id(self, load_number: str, csv_row: Dict[str, Any] = None) -> LoadLookupResult:
         """
         Enhanced fetch internal load ID with conditional PRO extraction workflow.
         
@@ -289,120 +381,112 @@ class LoadIDMapper:
             csv_row: Original CSV row data for PRO workflow determination
             
         Returns:
-            Tuple of (internal_load_id, status, error_message, pro_number, carrier_name, load_details)
+            LoadLookupResult with the internal load ID, status, error and basic load details
         """
-        # Get authentication headers using new debug method
-        url = f"{self.base_url}/brokerage-key/{self.brokerage_key}/brokerage-load-id/{load_number}"
-        logger.info(f"🔍 DEBUG: Constructed Load API URL: {url}")
+        url = self._load_url_prefix + quote(load_number, safe='')
         
         try:
-            headers = self.get_auth_headers()
-            logger.info(f"✅ DEBUG: Successfully got auth headers for {load_number}")
+            headers = self._get_cached_auth_headers()
         except Exception as auth_error:
-            logger.error(f"❌ DEBUG: Failed to get auth headers for {load_number}: {auth_error}")
-            return None, 'auth_failed', f'Authentication failed: {auth_error}', None, None, None
+            logger.debug("Failed to get auth headers for %s: %s", load_number, auth_error)
+            return LoadLookupResult(None, 'auth_failed', f'Authentication failed: {auth_error}')
         
-        for attempt in range(self.retry_count):
+        # Retries with backoff for connection errors and 5xx responses happen in the session adapter
+        try:
+            logger.debug("Fetching load ID for %s from %s", load_number, url)
+            
+            response = self.session.get(
+                url, 
+                headers=headers, 
+                timeout=self.timeout
+            )
+            
+        except requests.exceptions.Timeout:
+            logger.warning("Timeout for %s after %s attempts", load_number, self.retry_count)
+            return LoadLookupResult(None, 'timeout', f'API timeout after {self.retry_count} attempts')
+            
+        except requests.exceptions.ConnectionError as e:
+            # Exhausted read-timeout retries surface as ConnectionError wrapping ReadTimeoutError
+            if isinstance(getattr(e.args[0] if e.args else None, 'reason', None), ReadTimeoutError):
+                logger.warning("Timeout for %s after %s attempts", load_number, self.retry_count)
+                return LoadLookupResult(None, 'timeout', f'API timeout after {self.retry_count} attempts')
+            logger.warning("Connection error for %s after %s attempts", load_number, self.retry_count)
+            return LoadLookupResult(None, 'connection_error', f'Connection failed after {self.retry_count} attempts')
+            
+        except Exception as e:
+            logger.error("Unexpected error for %s: %s", load_number, e)
+            return LoadLookupResult(None, 'error', str(e))
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Load API response status for %s: %s", load_number, response.status_code)
+            logger.debug("Load API response headers: %s", dict(response.headers))
+            
+            if response.status_code != 200:
+                # Log response body for all non-200 responses
+                try:
+                    logger.debug("Load API response body: %s", response.text[:1000])  # First 1000 chars
+                except Exception as body_error:
+                    logger.debug("Could not read response body: %s", body_error)
+        
+        if response.status_code == 200:
             try:
-                logger.info(f"Fetching load ID for {load_number} (attempt {attempt + 1})")
-                
-                logger.info(f"🔍 DEBUG: Making request to URL: {url}")
-                logger.info(f"🔍 DEBUG: Request headers: {headers}")
-                
-                response = requests.get(
-                    url, 
-                    headers=headers, 
-                    timeout=self.timeout
-                )
-                
-                logger.info(f"🔍 DEBUG: Load API response status: {response.status_code}")
-                logger.info(f"🔍 DEBUG: Load API response headers: {dict(response.headers)}")
-                
-                if response.status_code != 200:
-                    # Log response body for all non-200 responses
-                    try:
-                        response_body = response.text[:1000]  # First 1000 chars
-                        logger.error(f"🔍 DEBUG: Load API response body: {response_body}")
-                    except Exception as body_error:
-                        logger.error(f"🔍 DEBUG: Could not read response body: {body_error}")
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    # Extract internal load ID from response
-                    # Adjust field name based on actual API response structure
-                    internal_id = data.get('load_id') or data.get('id') or data.get('internal_load_id')
-                    
-                    # Extract PRO number from various possible fields
-                    pro_number = (data.get('pro_number') or 
-                                data.get('PRO') or 
-                                data.get('proNumber') or
-                                data.get('tracking_number') or
-                                data.get('carrier_pro') or
-                                data.get('load', {}).get('pro_number') or
-                                data.get('load', {}).get('PRO'))
-                    
-                    # Extract carrier name from various possible fields  
-                    carrier_name = (data.get('carrier_name') or
-                                  data.get('carrier') or
-                                  data.get('load', {}).get('carrier_name') or
-                                  data.get('load', {}).get('carrier') or
-                                  data.get('carrier_company_name'))
-                    
-                    if internal_id:
-                        logger.info(f"Successfully retrieved load data for {load_number}: ID={internal_id}, PRO={pro_number}, Carrier={carrier_name}")
-                        return internal_id, 'success', None, pro_number, carrier_name, data
-                    else:
-                        logger.warning(f"No load ID found in response for {load_number}")
-                        return None, 'no_id_in_response', 'Load ID not found in API response', pro_number, carrier_name, data
-                        
-                elif response.status_code == 404:
-                    logger.warning(f"Load {load_number} not found in system")
-                    return None, 'not_found', f'Load {load_number} not found', None, None, None
-                    
-                elif response.status_code == 401:
-                    logger.error("🔍 DEBUG: Load API returned 401 Unauthorized")
-                    logger.error(f"🔍 DEBUG: This means the bearer token is not valid or expired")
-                    logger.error(f"🔍 DEBUG: Token being used: {headers.get('Authorization', 'NO AUTH HEADER')[:50]}...")
-                    return None, 'auth_failed', '401 Unauthorized - token invalid or expired', None, None, None
-                    
-                elif response.status_code == 403:
-                    logger.error("🔍 DEBUG: Load API returned 403 Forbidden")
-                    logger.error(f"🔍 DEBUG: Token is valid but lacks permissions for this endpoint")
-                    logger.error(f"🔍 DEBUG: Endpoint: {url}")
-                    return None, 'access_forbidden', '403 Forbidden - insufficient permissions', None, None, None
-                    
+                data = response.json()
+            
+                # Extract internal load ID from response
+                # Adjust field name based on actual API response structure
+                internal_id = data.get('load_id') or data.get('id') or data.get('internal_load_id')
+            
+                # Extract PRO number from various possible fields
+                pro_number = (data.get('pro_number') or 
+                            data.get('PRO') or 
+                            data.get('proNumber') or
+                            data.get('tracking_number') or
+                            data.get('carrier_pro') or
+                            data.get('load', {}).get('pro_number') or
+                            data.get('load', {}).get('PRO'))
+            
+                # Extract carrier name from various possible fields  
+                carrier_name = (data.get('carrier_name') or
+                              data.get('carrier') or
+                              data.get('load', {}).get('carrier_name') or
+                              data.get('load', {}).get('carrier') or
+                              data.get('carrier_company_name'))
+            
+                if internal_id:
+                    logger.debug("Retrieved load data for %s: ID=%s, PRO=%s, Carrier=%s", load_number, internal_id, pro_number, carrier_name)
+                    return LoadLookupResult(internal_id, 'success', None, pro_number, carrier_name, data)
                 else:
-                    logger.error(f"🔍 DEBUG: Load API returned unexpected status {response.status_code} for {load_number}")
-                    logger.error(f"🔍 DEBUG: Full response details logged above")
-                    error_msg = f"API error: {response.status_code}"
-                    
-                    # Don't retry on client errors (4xx)
-                    if 400 <= response.status_code < 500:
-                        logger.error(f"🔍 DEBUG: Client error - will not retry")
-                        return None, 'client_error', error_msg, None, None, None
-                        
-            except requests.exceptions.Timeout:
-                logger.warning(f"Timeout on attempt {attempt + 1} for {load_number}")
-                if attempt == self.retry_count - 1:
-                    return None, 'timeout', f'API timeout after {self.retry_count} attempts', None, None, None
-                    
-            except requests.exceptions.ConnectionError:
-                logger.warning(f"Connection error on attempt {attempt + 1} for {load_number}")
-                if attempt == self.retry_count - 1:
-                    return None, 'connection_error', f'Connection failed after {self.retry_count} attempts', None, None, None
-                    
+                    logger.warning("No load ID found in response for %s", load_number)
+                    return LoadLookupResult(None, 'no_id_in_response', 'Load ID not found in API response', pro_number, carrier_name, data)
             except Exception as e:
-                logger.error(f"Unexpected error on attempt {attempt + 1} for {load_number}: {e}")
-                if attempt == self.retry_count - 1:
-                    return None, 'error', str(e), None, None, None
-            
-            # Wait before retry
-            if attempt < self.retry_count - 1:
-                time.sleep(self.retry_delay)
+                # A malformed 200 body fails only this lookup, not the whole batch
+                logger.error("Unexpected response body for %s: %s", load_number, e)
+                return LoadLookupResult(None, 'error', str(e))
                 
-        return None, 'failed', f'All {self.retry_count} attempts failed', None, None, None
-    
+        elif response.status_code == 404:
+            logger.warning("Load %s not found in system", load_number)
+            return LoadLookupResult(None, 'not_found', f'Load {load_number} not found')
+            
+        elif response.status_code == 401:
+            logger.error("Load API returned 401 Unauthorized for %s - bearer token invalid or expired", load_number)
+            return LoadLookupResult(None, 'auth_failed', '401 Unauthorized - token invalid or expired')
+            
+        elif response.status_code == 403:
+            logger.error("Load API returned 403 Forbidden for %s - token lacks permissions for %s", load_number, url)
+            return LoadLookupResult(None, 'access_forbidden', '403 Forbidden - insufficient permissions')
+            
+        else:
+            logger.error("Load API returned unexpected status %s for %s", response.status_code, load_number)
+            error_msg = f"API error: {response.status_code}"
+            
+            # Don't retry on client errors (4xx)
+            if 400 <= response.status_code < 500:
+                logger.debug("Client error for %s - will not retry", load_number)
+                return LoadLookupResult(None, 'client_error', error_msg)
+
+            # 5xx still failing once the adapter has used up its retries
+            return LoadLookupResult(None, 'failed', f'All {self.retry_count} attempts failed')
+
     def _fetch_internal_load_id_enhanced(self, load_number: str, csv_row: Dict[str, Any] = None) -> LoadIDMapping:
         """
         Enhanced load ID fetching with conditional PRO extraction workflow.
@@ -437,7 +521,7 @@ class LoadIDMapper:
         # If API call failed, return early
         if status != 'success' or not internal_id:
             mapping.workflow_path = 'api_failed'
-            logger.warning(f"API call failed for {load_number}: {status}")
+            logger.warning("API call failed for %s: %s", load_number, status)
             return mapping
         
         # Step 2: Determine PRO workflow path
@@ -452,18 +536,18 @@ class LoadIDMapper:
             mapping.pro_source_type = source_type
             mapping.pro_confidence = 'high'
             mapping.pro_context = context
-            logger.info(f"Direct tracking workflow for {load_number}: PRO={final_pro}")
+            logger.info("Direct tracking workflow for %s: PRO=%s", load_number, final_pro)
             return mapping
         
         # Step 3: Full workflow - extract PRO from agent events
-        logger.info(f"Executing full workflow for {load_number} - fetching agent events")
+        logger.info("Executing full workflow for %s - fetching agent events", load_number)
         
         # Fetch agent events
         agent_events = self._get_agent_events(internal_id)
         mapping.agent_events_data = agent_events
         
         if not agent_events:
-            logger.warning(f"No agent events found for {load_number}")
+            logger.warning("No agent events found for %s", load_number)
             mapping.pro_source_type = 'none'
             mapping.pro_confidence = 'none'
             mapping.pro_context = 'No agent events available'
@@ -478,9 +562,9 @@ class LoadIDMapper:
             mapping.pro_source_type = source_type
             mapping.pro_confidence = confidence
             mapping.pro_context = context
-            logger.info(f"Successfully extracted PRO {extracted_pro} from {source_type} for {load_number}")
+            logger.info("Successfully extracted PRO %s from %s for %s", extracted_pro, source_type, load_number)
         else:
-            logger.warning(f"No PRO number extracted from agent events for {load_number}")
+            logger.warning("No PRO number extracted from agent events for %s", load_number)
             mapping.pro_source_type = 'none'
             mapping.pro_confidence = 'none'
             mapping.pro_context = 'PRO extraction failed from agent events'
@@ -489,34 +573,13 @@ class LoadIDMapper:
     
     def get_mapping_summary(self, mappings: List[LoadIDMapping]) -> Dict[str, int]:
         """Get summary statistics for load ID mappings."""
-        summary = {
-            'total': len(mappings),
-            'success': 0,
-            'failed': 0,
-            'not_found': 0,
-            'load_processing_failed': 0,
-            'auth_failed': 0,
-            'timeout': 0,
-            'connection_error': 0,
-            'other_error': 0
-        }
-        
-        for mapping in mappings:
-            if mapping.api_status == 'success':
-                summary['success'] += 1
-            elif mapping.api_status == 'not_found':
-                summary['not_found'] += 1
-            elif mapping.api_status == 'load_processing_failed':
-                summary['load_processing_failed'] += 1
-            elif mapping.api_status == 'auth_failed':
-                summary['auth_failed'] += 1
-            elif mapping.api_status == 'timeout':
-                summary['timeout'] += 1
-            elif mapping.api_status == 'connection_error':
-                summary['connection_error'] += 1
-            else:
-                summary['other_error'] += 1
-                
+        counts = Counter(mapping.api_status for mapping in mappings)
+        summary = {'total': len(mappings), 'success': counts['success'], 'failed': 0}
+        summary.update((status, counts[status]) for status in SUMMARY_STATUSES)
+        summary['other_error'] = sum(
+            count for status, count in counts.items()
+            if status != 'success' and status not in SUMMARY_STATUSES
+        )
         summary['failed'] = summary['total'] - summary['success']
         return summary
 
@@ -532,12 +595,11 @@ class LoadIDMapper:
             Tuple of (workflow_path, pro_number, source_type, context)
         """
         # Priority 1: Check CSV PRO field first
-        csv_pro_fields = ['PRO', 'pro_number', 'ProNumber', 'tracking_number', 'carrier_pro']
-        for field in csv_pro_fields:
+        for field in CSV_PRO_FIELDS:
             pro_value = csv_row.get(field)
             if pro_value and str(pro_value).strip():
                 pro_number = str(pro_value).strip()
-                logger.info(f"Found PRO number in CSV field '{field}': {pro_number}")
+                logger.info("Found PRO number in CSV field '%s': %s", field, pro_number)
                 return 'direct_tracking', pro_number, 'csv', f"Found in CSV field '{field}'"
         
         # Priority 2: Check load details reference numbers
@@ -545,7 +607,7 @@ class LoadIDMapper:
             pro_from_refs = self._extract_pro_from_reference_numbers(load_details)
             if pro_from_refs:
                 pro_number, context = pro_from_refs
-                logger.info(f"Found PRO number in load details reference numbers: {pro_number}")
+                logger.info("Found PRO number in load details reference numbers: %s", pro_number)
                 return 'direct_tracking', pro_number, 'reference_numbers', context
         
         # No PRO found - need full workflow
@@ -566,14 +628,11 @@ class LoadIDMapper:
         if not reference_numbers:
             return None
         
-        # Look for PRO-related reference names
-        pro_ref_names = ['pro_number', 'pro', 'PRO', 'tracking_number', 'carrier_pro', 'pro_num']
-        
         for ref in reference_numbers:
-            ref_name = ref.get('name', '').lower()
             ref_value = ref.get('value', '')
             
-            if any(pro_name.lower() in ref_name for pro_name in pro_ref_names) and ref_value:
+            # Look for PRO-related reference names
+            if ref_value and PRO_REFERENCE_NAME_PATTERN.search(ref.get('name', '')):
                 pro_number = str(ref_value).strip()
                 if self._validate_pro_format(pro_number):
                     context = f"Found in reference number '{ref.get('name')}'"
@@ -600,26 +659,21 @@ class LoadIDMapper:
             'limit': 1000
         }
         
-        headers = {
-            'Content-Type': 'application/json',
-            'Authorization': f'Bearer {self.api_key}'
-        }
-        
         try:
-            logger.info(f"Fetching agent events for load ID: {internal_load_id}")
-            response = requests.get(url, params=params, headers=headers, timeout=self.timeout)
+            logger.debug("Fetching agent events for load ID: %s", internal_load_id)
+            response = self.session.get(url, params=params, headers=self._events_headers, timeout=self.timeout)
             
             if response.status_code == 200:
                 events_data = response.json()
                 events = events_data.get('records', [])
-                logger.info(f"Retrieved {len(events)} agent events for load {internal_load_id}")
+                logger.debug("Retrieved %d agent events for load %s", len(events), internal_load_id)
                 return events
             else:
-                logger.warning(f"Agent events API returned {response.status_code} for load {internal_load_id}")
+                logger.warning("Agent events API returned %s for load %s", response.status_code, internal_load_id)
                 return None
                 
         except Exception as e:
-            logger.error(f"Error fetching agent events for load {internal_load_id}: {e}")
+            logger.error("Error fetching agent events for load %s: %s", internal_load_id, e)
             return None
 
     def _extract_pro_from_events(self, events: List[Dict[str, Any]], original_load_number: str) -> Optional[Tuple[str, str, str, str]]:
@@ -674,7 +728,7 @@ class LoadIDMapper:
                             not self._is_internal_load_number(pro_candidate, original_load_number)):
                             
                             context = f"Found in {source_type} event ({text_source}): {event.get('id', 'unknown')}"
-                            logger.info(f"Extracted PRO {pro_candidate} from {source_type} event")
+                            logger.info("Extracted PRO %s from %s event", pro_candidate, source_type)
                             return pro_candidate, source_type, confidence, context
         
         logger.info("No PRO number found in agent events")
@@ -5,7 +5,7 @@ Run this as a standalone app: streamlit run setup_google_drive.py
 """
 
 import streamlit as st
-from google_drive_auth import google_drive_auth
+from google_drive_auth import get_google_drive_auth
 
 def main():
     st.set_page_config(
@@ -14,6 +14,8 @@ def main():
         layout="wide"
     )
     
+    google_drive_auth = get_google_drive_auth()
+    
     st.title("🔄 Google Drive Backup Setup")
     st.markdown("Configure Google Drive authentication for SQLite database backup")
     
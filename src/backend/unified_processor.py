@@ -350,10 +350,7 @@ class UnifiedLoadProcessor:
             return data
         
         try:
-            enriched_data = []
-            for row in data:
-                enriched_row = self.enrichment_manager.enrich_data(row)
-                enriched_data.append(enriched_row)
+            enriched_data = self.enrichment_manager.enrich_rows(data)
             
             logger.info(f"Enriched {len(enriched_data)} rows")
             return enriched_data
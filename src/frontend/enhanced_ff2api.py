@@ -2575,9 +2575,9 @@ def _process_load_id_mapping(ff2api_results, brokerage_key):
                 logger.error(f"Error processing FF2API result {i}: {e}, result type: {type(result)}, result: {result}")
                 continue
         
-        # Process load ID mappings
-        mappings = load_id_mapper.map_load_ids(load_processing_results)
-        return mappings
+        # Process load ID mappings; this mapper is single-use, so release its pooled connections
+        with load_id_mapper:
+            return load_id_mapper.map_load_ids(load_processing_results)
         
     except Exception as e:
         logger.error(f"Load ID mapping error: {e}")
@@ -2705,9 +2705,6 @@ def _process_data_enrichment(ff2api_results, load_mappings, brokerage_key):
                 if load_mapping and load_mapping.error_message:
                     enriched_row['load_id_error'] = load_mapping.error_message
             
-            # Apply enrichment - THIS IS THE KEY MISSING CALL
-            logger.info(f"Applying enrichment to row {i}")
-            
             # DEBUG: Log row data being passed to enrichment
             logger.info(f"🔍 DEBUG Row {i}: PRO field = '{enriched_row.get('PRO')}'")
             logger.info(f"🔍 DEBUG Row {i}: carrier field = '{enriched_row.get('carrier')}'") 
@@ -2715,11 +2712,13 @@ def _process_data_enrichment(ff2api_results, load_mappings, brokerage_key):
             logger.info(f"🔍 DEBUG Row {i}: carrier_name field = '{enriched_row.get('carrier_name')}'")
             logger.info(f"🔍 DEBUG Row {i}: All fields available: {list(enriched_row.keys())}")
             
-            pre_enrichment_columns = set(enriched_row.keys())
-            enriched_row = enrichment_manager.enrich_row(enriched_row)
-            post_enrichment_columns = set(enriched_row.keys())
-            new_columns = post_enrichment_columns - pre_enrichment_columns
-            
+            enriched_data.append(enriched_row)
+        
+        # Enrich all rows in one batch so tracking API lookups run concurrently
+        enriched_rows = enrichment_manager.enrich_rows(enriched_data)
+        
+        for i, (row, enriched_row) in enumerate(zip(enriched_data, enriched_rows)):
+            new_columns = set(enriched_row.keys()) - set(row.keys())
             if new_columns:
                 logger.info(f"Row {i}: Enrichment added columns: {new_columns}")
             else:
@@ -2728,8 +2727,8 @@ def _process_data_enrichment(ff2api_results, load_mappings, brokerage_key):
             # Add processing metadata
             enriched_row['processing_status'] = 'processed'
             enriched_row['enrichment_timestamp'] = pd.Timestamp.now().isoformat()
-            
-            enriched_data.append(enriched_row)
+        
+        enriched_data = enriched_rows
         
         logger.info(f"Data enrichment complete: processed {len(enriched_data)} rows")
         
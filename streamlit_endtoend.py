@@ -23,7 +23,6 @@ from workflow_processor import EndToEndWorkflowProcessor, WorkflowResults
 from load_id_mapper import LoadIDMapping
 from credential_manager import credential_manager
 from email_monitor import email_monitor
-from gmail_auth_service import gmail_auth_service
 from streamlit_google_sso import streamlit_google_sso
 
 # Import database backup manager
@@ -466,7 +466,7 @@ client_secret = "your-universal-client-secret"
             st.session_state.google_sso_auth[brokerage_key] = auth_data
             
             # Also integrate with existing credential manager
-            from gmail_auth_service import GmailCredentials, gmail_auth_service
+            from gmail_auth_service import GmailCredentials, get_gmail_auth_service
             
             credentials = GmailCredentials(
                 access_token=auth_data['access_token'],
@@ -477,7 +477,7 @@ client_secret = "your-universal-client-secret"
                 client_id=self._config['client_id']
             )
             
-            gmail_auth_service.store_credentials(brokerage_key, credentials)
+            get_gmail_auth_service().store_credentials(brokerage_key, credentials)
             
         except Exception as e:
             logger.error(f"Error storing auth data: {e}")
@@ -501,8 +501,8 @@ client_secret = "your-universal-client-secret"
                             return refreshed_auth
             
             # Fallback to credential manager
-            from gmail_auth_service import gmail_auth_service
-            credentials = gmail_auth_service.get_credentials(brokerage_key)
+            from gmail_auth_service import get_gmail_auth_service
+            credentials = get_gmail_auth_service().get_credentials(brokerage_key)
             if credentials:
                 return {
                     'access_token': credentials.access_token,
@@ -537,8 +537,8 @@ client_secret = "your-universal-client-secret"
                 st.session_state.google_sso_auth.pop(brokerage_key, None)
             
             # Clear from credential manager
-            from gmail_auth_service import gmail_auth_service
-            gmail_auth_service.revoke_credentials(brokerage_key)
+            from gmail_auth_service import get_gmail_auth_service
+            get_gmail_auth_service().revoke_credentials(brokerage_key)
             
             # Clear additional session state keys that might cause conflicts
             keys_to_clear = [
@@ -561,8 +561,8 @@ client_secret = "your-universal-client-secret"
     def _test_gmail_connection(self, brokerage_key: str, auth_data: Dict[str, Any]) -> Dict[str, Any]:
         """Test Gmail connection with stored credentials."""
         try:
-            from gmail_auth_service import gmail_auth_service
-            return gmail_auth_service.test_credentials(brokerage_key)
+            from gmail_auth_service import get_gmail_auth_service
+            return get_gmail_auth_service().test_credentials(brokerage_key)
             
         except Exception as e:
             logger.error(f"Error testing connection: {e}")
@@ -571,11 +571,11 @@ client_secret = "your-universal-client-secret"
     def _refresh_auth_token(self, brokerage_key: str, auth_data: Dict[str, Any]) -> Dict[str, Any]:
         """Refresh authentication token."""
         try:
-            from gmail_auth_service import gmail_auth_service
-            credentials = gmail_auth_service.get_credentials(brokerage_key)
+            from gmail_auth_service import get_gmail_auth_service
+            credentials = get_gmail_auth_service().get_credentials(brokerage_key)
             
             if credentials:
-                refreshed = gmail_auth_service.refresh_credentials(brokerage_key, credentials)
+                refreshed = get_gmail_auth_service().refresh_credentials(brokerage_key, credentials)
                 if refreshed:
                     # Update session state
                     self._store_auth_data(brokerage_key, {
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Unit tests for EnrichmentManager.enrich_rows error handling with batch and per-row sources
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from enrichment.base import EnrichmentSource
+from enrichment.manager import EnrichmentManager
+
+
+class FlakySource(EnrichmentSource):
+    """Per-row source that fails for rows marked 'bad'."""
+
+    def enrich(self, row):
+        if row.get('bad'):
+            raise ValueError('bad row')
+        return {**row, 'enriched': True}
+
+
+class BatchSource(FlakySource):
+    """Batch-capable source whose batch call can be made to fail."""
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.batch_calls = 0
+
+    def enrich_batch(self, rows):
+        self.batch_calls += 1
+        if self.config.get('fail_batch'):
+            raise RuntimeError('batch failed')
+        return [self.enrich(row) if not row.get('bad') else row for row in rows]
+
+
+def make_manager(*sources):
+    manager = EnrichmentManager([])
+    manager.sources = list(sources)
+    return manager
+
+
+class EnrichRowsTest(unittest.TestCase):
+
+    def test_per_row_failure_marks_only_that_row(self):
+        rows = [{'id': 1}, {'id': 2, 'bad': True}, {'id': 3}]
+
+        enriched = make_manager(FlakySource({})).enrich_rows(rows)
+
+        self.assertEqual([row.get('enriched') for row in enriched], [True, None, True])
+        self.assertEqual(enriched[1]['enrichment_error'], 'bad row')
+        self.assertEqual(enriched[1]['FlakySource_error'], 'bad row')
+        self.assertNotIn('enrichment_error', enriched[0])
+        self.assertNotIn('enrichment_error', rows[1])
+
+    def test_batch_source_is_called_once(self):
+        source = BatchSource({})
+
+        enriched = make_manager(source).enrich_rows([{'id': 1}, {'id': 2}])
+
+        self.assertEqual(source.batch_calls, 1)
+        self.assertEqual([row['enriched'] for row in enriched], [True, True])
+
+    def test_failed_batch_falls_back_to_per_row_errors(self):
+        rows = [{'id': 1}, {'id': 2, 'bad': True}]
+
+        enriched = make_manager(BatchSource({'fail_batch': True})).enrich_rows(rows)
+
+        self.assertTrue(enriched[0]['enriched'])
+        self.assertNotIn('enrichment_error', enriched[0])
+        self.assertEqual(enriched[1]['enrichment_error'], 'bad row')
+        self.assertEqual(enriched[1]['BatchSource_error'], 'bad row')
+
+
+if __name__ == "__main__":
+    unittest.main()
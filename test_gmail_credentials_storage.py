@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Unit tests for GmailAuthService encrypted credential storage and per-session token cache, using a temporary config directory
+"""
+
+import base64
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import gmail_auth_service
+from gmail_auth_service import GmailAuthService, GmailCredentials
+
+
+def make_credentials(email='ops@example.com', token_expiry=datetime(2030, 1, 1, 12, 0, 0)):
+    """Build a GmailCredentials record for storage round trips."""
+    return GmailCredentials(
+        access_token='access-token',
+        refresh_token='refresh-token',
+        token_expiry=token_expiry,
+        email=email,
+        scopes=['https://www.googleapis.com/auth/gmail.readonly'],
+        client_id='client-id'
+    )
+
+
+class NoScriptRunStreamlit:
+    """Streamlit stand-in whose session_state fails as it does outside a script run."""
+
+    def __init__(self, secrets):
+        self.secrets = secrets
+
+    @property
+    def session_state(self):
+        raise RuntimeError('missing ScriptRunContext')
+
+
+class GmailServiceTestCase(unittest.TestCase):
+    """Runs each test in an empty working directory so config/ starts fresh."""
+
+    def setUp(self):
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(workdir)
+
+        self.creds_file = os.path.join('config', 'gmail_creds_test_brokerage.enc')
+
+    def make_service(self, streamlit=None, **google_secrets):
+        if streamlit is None:
+            streamlit = SimpleNamespace(secrets={'google': google_secrets}, session_state={})
+        patcher = mock.patch.object(gmail_auth_service, 'st', streamlit)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        service = GmailAuthService()
+        service._session = mock.Mock()
+        return service
+
+
+class CredentialStorageTest(GmailServiceTestCase):
+
+    def test_round_trip(self):
+        service = self.make_service(token_encryption_key='current')
+        service._save_encrypted_credentials('test-brokerage', make_credentials())
+
+        with open(self.creds_file, 'rb') as f:
+            self.assertTrue(f.read().startswith(GmailAuthService.FERNET_TOKEN_PREFIX))
+
+        fresh = self.make_service(token_encryption_key='current')
+        self.assertEqual(fresh._load_encrypted_credentials('test-brokerage'), make_credentials())
+
+    def test_file_key_is_only_created_without_secrets(self):
+        self.make_service(token_encryption_key='current')
+        self.assertFalse(os.path.exists(os.path.join('config', 'encryption.key')))
+
+        self.make_service()
+        self.assertTrue(os.path.exists(os.path.join('config', 'encryption.key')))
+
+    def test_old_key_file_is_rotated_to_newest_key(self):
+        old = self.make_service(token_encryption_key='old')
+        old._save_encrypted_credentials('test-brokerage', make_credentials())
+
+        rotated = self.make_service(token_encryption_keys='new, old')
+        self.assertEqual(rotated._load_encrypted_credentials('test-brokerage'), make_credentials())
+
+        # The rewritten file no longer needs the retired key
+        new_only = self.make_service(token_encryption_keys=['new'])
+        self.assertEqual(new_only._load_encrypted_credentials('test-brokerage'), make_credentials())
+
+    def test_unknown_key_is_not_loaded(self):
+        self.make_service(token_encryption_key='old')._save_encrypted_credentials(
+            'test-brokerage', make_credentials()
+        )
+
+        self.assertIsNone(self.make_service(token_encryption_key='other')._load_encrypted_credentials('test-brokerage'))
+
+    def test_legacy_base64_wrapped_file_is_read(self):
+        service = self.make_service(token_encryption_key='current')
+        creds_data = {
+            'access_token': 'access-token',
+            'refresh_token': 'refresh-token',
+            'token_expiry': datetime(2030, 1, 1, 12, 0, 0).isoformat(),
+            'email': 'ops@example.com',
+            'scopes': ['https://www.googleapis.com/auth/gmail.readonly'],
+            'client_id': 'client-id'
+        }
+        os.makedirs('config')
+        with open(self.creds_file, 'wb') as f:
+            f.write(base64.b64encode(service.cipher.encrypt(json.dumps(creds_data).encode())))
+
+        self.assertEqual(service._load_encrypted_credentials('test-brokerage'), make_credentials())
+
+    def test_unchanged_file_is_not_decrypted_again(self):
+        service = self.make_service(token_encryption_key='current')
+        service._save_encrypted_credentials('test-brokerage', make_credentials())
+
+        first = service._load_encrypted_credentials('test-brokerage')
+        with mock.patch.object(service, '_primary_cipher') as cipher:
+            self.assertIs(service._load_encrypted_credentials('test-brokerage'), first)
+            cipher.decrypt.assert_not_called()
+
+        # Saving replaces the cached record
+        service._save_encrypted_credentials('test-brokerage', make_credentials(email='new@example.com'))
+        self.assertEqual(service._load_encrypted_credentials('test-brokerage').email, 'new@example.com')
+
+    def test_missing_file_returns_none(self):
+        service = self.make_service(token_encryption_key='current')
+        self.assertIsNone(service._load_encrypted_credentials('test-brokerage'))
+
+    def test_credentials_work_without_session_state(self):
+        streamlit = NoScriptRunStreamlit({'google': {'token_encryption_key': 'current'}})
+        service = self.make_service(streamlit)
+
+        service.store_credentials('test-brokerage', make_credentials())
+        self.assertTrue(os.path.exists(self.creds_file))
+        self.assertEqual(self.make_service(streamlit).get_credentials('test-brokerage'), make_credentials())
+
+        self.assertTrue(service.revoke_credentials('test-brokerage'))
+        self.assertFalse(os.path.exists(self.creds_file))
+
+
+class TokenCacheTest(GmailServiceTestCase):
+    """Access token cache kept in each Streamlit session's state."""
+
+    def setUp(self):
+        super().setUp()
+        self.streamlit = SimpleNamespace(secrets={'google': {'token_encryption_key': 'current'}}, session_state={})
+        self.service = self.make_service(self.streamlit)
+
+    def test_cached_token_is_not_visible_to_other_sessions(self):
+        session_a = self.streamlit.session_state
+        self.service.store_credentials('test-brokerage', make_credentials())
+        os.remove(self.creds_file)
+
+        self.streamlit.session_state = {}
+        self.assertIsNone(self.service.get_credentials('test-brokerage'))
+
+        self.streamlit.session_state = session_a
+        session_a['gmail_credentials'].clear()
+        self.assertEqual(self.service.get_credentials('test-brokerage'), make_credentials())
+
+    def test_token_near_expiry_is_not_cached(self):
+        credentials = make_credentials(token_expiry=datetime.now() + timedelta(seconds=60))
+        self.service.store_credentials('test-brokerage', credentials)
+
+        self.assertNotIn('test-brokerage', self.streamlit.session_state[GmailAuthService.TOKEN_CACHE_KEY])
+
+    def test_revoke_clears_cached_token(self):
+        self.service.store_credentials('test-brokerage', make_credentials())
+        self.assertIn('test-brokerage', self.streamlit.session_state[GmailAuthService.TOKEN_CACHE_KEY])
+
+        self.assertTrue(self.service.revoke_credentials('test-brokerage'))
+        self.assertEqual(self.streamlit.session_state[GmailAuthService.TOKEN_CACHE_KEY], {})
+        self.assertIsNone(self.service.get_credentials('test-brokerage'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the HMAC-signed OAuth2 state parameter used by GoogleSignInAuth
+"""
+
+import base64
+import os
+import sys
+import unittest
+from types import MappingProxyType, SimpleNamespace
+from unittest import mock
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import google_signin_auth
+from google_signin_auth import GoogleSignInAuth
+
+
+def signin_secrets(client_secret='test-secret'):
+    """Build a [google_signin] secrets section."""
+    return MappingProxyType({
+        'client_id': 'test-client-id',
+        'client_secret': client_secret,
+        'redirect_uri': 'https://app.example.com/callback'
+    })
+
+
+class SignedStateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1_700_000_000.0
+        patcher = mock.patch.object(google_signin_auth, 'time', SimpleNamespace(time=lambda: self.now))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_auth(self, client_secret='test-secret'):
+        with mock.patch.object(google_signin_auth, '_read_google_signin_secrets',
+                               return_value=signin_secrets(client_secret)):
+            return GoogleSignInAuth()
+
+    def test_round_trip_returns_brokerage_key(self):
+        auth = self.make_auth()
+        state = auth._sign_state('acme-logistics')
+
+        self.assertNotIn('=', state)
+        self.assertEqual(auth._verify_state(state), 'acme-logistics')
+
+    def test_brokerage_key_with_separator_characters(self):
+        auth = self.make_auth()
+        self.assertEqual(auth._verify_state(auth._sign_state('acme|east.coast')), 'acme|east.coast')
+
+    def test_tampered_payload_is_rejected(self):
+        auth = self.make_auth()
+        raw = base64.urlsafe_b64decode(auth._sign_state('acme') + '==')
+        forged = raw.replace(b'acme', b'evil', 1)
+
+        self.assertIsNone(auth._verify_state(base64.urlsafe_b64encode(forged).decode()))
+
+    def test_tampered_signature_is_rejected(self):
+        auth = self.make_auth()
+        raw = bytearray(base64.urlsafe_b64decode(auth._sign_state('acme') + '=='))
+        raw[-1] ^= 0x01
+
+        self.assertIsNone(auth._verify_state(base64.urlsafe_b64encode(bytes(raw)).decode()))
+
+    def test_state_signed_with_another_secret_is_rejected(self):
+        state = self.make_auth(client_secret='other-secret')._sign_state('acme')
+        self.assertIsNone(self.make_auth()._verify_state(state))
+
+    def test_malformed_state_is_rejected(self):
+        auth = self.make_auth()
+        for state in ('', 'not-a-state', 'acme', '%%%'):
+            self.assertIsNone(auth._verify_state(state), state)
+
+    def test_state_expires_after_max_age(self):
+        auth = self.make_auth()
+        state = auth._sign_state('acme')
+
+        self.now += GoogleSignInAuth.STATE_MAX_AGE_SECONDS
+        self.assertEqual(auth._verify_state(state), 'acme')
+
+        self.now += 1
+        self.assertIsNone(auth._verify_state(state))
+
+
+if __name__ == "__main__":
+    unittest.main()
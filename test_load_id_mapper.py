@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Unit tests for LoadIDMapper batch lookups, using a mocked HTTP session
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+from concurrent.futures import Future
+from unittest import mock
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+
+import load_id_mapper
+from load_id_mapper import LoadIDMapper, LoadProcessingResult
+
+
+def load_response(status_code=200, body=None):
+    """Build a mocked Load API response."""
+    response = mock.Mock(status_code=status_code, headers={}, text='')
+    response.json.return_value = body if body is not None else {}
+    return response
+
+
+def load_number_from_url(url):
+    """Load number is the last path segment of the Load API URL."""
+    return url.rsplit('/', 1)[1]
+
+
+class LoadIDMapperTestCase(unittest.TestCase):
+    """Builds mappers whose session is a mock and whose auth headers are pre-resolved."""
+
+    def make_mapper(self, get, **credentials):
+        mapper = LoadIDMapper('test-brokerage', {'api_key': 'test-key', **credentials})
+        mapper.session = mock.Mock()
+        mapper.session.get.side_effect = get
+        mapper._auth_headers = {'Authorization': 'Bearer test-token'}
+        return mapper
+
+    def map_loads(self, mapper, load_numbers):
+        """Map successfully processed loads whose CSV rows already carry a PRO (no agent events call)."""
+        results = [LoadProcessingResult(index, load_number, True) for index, load_number in enumerate(load_numbers)]
+        rows = [{'PRO': f'PRO-{load_number}'} for load_number in load_numbers]
+        return mapper.map_load_ids(results, rows)
+
+
+class MalformedResponseTest(LoadIDMapperTestCase):
+
+    def test_non_json_body_is_an_error_result(self):
+        def get(url, **kwargs):
+            response = load_response()
+            response.json.side_effect = ValueError('Expecting value')
+            return response
+
+        mapper = self.make_mapper(get)
+        result = mapper._fetch_internal_load_id('L1')
+
+        self.assertEqual(result.status, 'error')
+        self.assertIsNone(result.internal_load_id)
+
+    def test_null_nested_load_is_an_error_result(self):
+        mapper = self.make_mapper(lambda url, **kwargs: load_response(body={'load': None}))
+
+        self.assertEqual(mapper._fetch_internal_load_id('L1').status, 'error')
+
+    def test_malformed_body_does_not_fail_the_batch(self):
+        def get(url, **kwargs):
+            load_number = load_number_from_url(url)
+            if load_number == 'BAD':
+                response = load_response()
+                response.json.side_effect = ValueError('Expecting value')
+                return response
+            return load_response(body={'id': f'id-{load_number}'})
+
+        mappings = self.map_loads(self.make_mapper(get), ['L1', 'BAD', 'L2'])
+
+        self.assertEqual([mapping.api_status for mapping in mappings], ['success', 'error', 'success'])
+        self.assertEqual(mappings[1].workflow_path, 'api_failed')
+
+
+class MapLoadIdsTest(LoadIDMapperTestCase):
+
+    def test_results_follow_input_order(self):
+        # Earlier loads answer last, so completion order is the reverse of input order
+        delays = {'L1': 0.06, 'L2': 0.03, 'L3': 0.0}
+
+        def get(url, **kwargs):
+            load_number = load_number_from_url(url)
+            time.sleep(delays[load_number])
+            return load_response(body={'id': f'id-{load_number}'})
+
+        mapper = self.make_mapper(get)
+        results = [
+            LoadProcessingResult(0, 'L1', True),
+            LoadProcessingResult(1, None, False, error_message='create failed'),
+            LoadProcessingResult(2, 'L2', True),
+            LoadProcessingResult(3, 'L3', True),
+        ]
+
+        mappings = mapper.map_load_ids(results, [{'PRO': f'PRO-{index}'} for index in range(4)])
+
+        self.assertEqual([mapping.csv_row_index for mapping in mappings], [0, 1, 2, 3])
+        self.assertEqual([mapping.internal_load_id for mapping in mappings], ['id-L1', None, 'id-L2', 'id-L3'])
+        self.assertEqual(mappings[1].api_status, 'load_processing_failed')
+        self.assertEqual(mappings[1].error_message, 'create failed')
+
+    def test_duplicate_load_numbers_share_one_request(self):
+        # The owner's request stays open until both other workers are waiting on its Future
+        waiters = threading.Semaphore(0)
+
+        class WatchedFuture(Future):
+            def result(self, timeout=None):
+                waiters.release()
+                return super().result(timeout)
+
+        def get(url, **kwargs):
+            for _ in range(2):
+                self.assertTrue(waiters.acquire(timeout=5))
+            return load_response(body={'id': 'id-L1'})
+
+        mapper = self.make_mapper(get)
+        with mock.patch.object(load_id_mapper, 'Future', WatchedFuture):
+            mappings = self.map_loads(mapper, ['L1', 'L1', 'L1'])
+
+        self.assertEqual(mapper.session.get.call_count, 1)
+        self.assertEqual([mapping.internal_load_id for mapping in mappings], ['id-L1'] * 3)
+        self.assertEqual(mapper._inflight, {})
+
+    def test_successful_lookups_are_reused_across_batches(self):
+        mapper = self.make_mapper(lambda url, **kwargs: load_response(body={'id': 'id-L1'}))
+
+        self.map_loads(mapper, ['L1'])
+        self.map_loads(mapper, ['L1'])
+
+        self.assertEqual(mapper.session.get.call_count, 1)
+
+    def test_failed_lookup_keeps_the_rest_of_the_batch(self):
+        def get(url, **kwargs):
+            load_number = load_number_from_url(url)
+            if load_number == 'MISSING':
+                return load_response(404)
+            if load_number == 'DOWN':
+                raise requests.exceptions.ConnectionError('refused')
+            return load_response(body={'id': f'id-{load_number}'})
+
+        mappings = self.map_loads(self.make_mapper(get), ['L1', 'MISSING', 'DOWN', 'L2'])
+
+        self.assertEqual(
+            [mapping.api_status for mapping in mappings],
+            ['success', 'not_found', 'connection_error', 'success']
+        )
+        self.assertEqual([mapping.internal_load_id for mapping in mappings], ['id-L1', None, None, 'id-L2'])
+
+
+if __name__ == "__main__":
+    unittest.main()
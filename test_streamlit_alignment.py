@@ -60,10 +60,8 @@ def test_tracking_api_alignment():
         
         # Verify it would use correct brokerageKey
         # We can't easily test the actual API call without mocking requests,
-        # but we can verify the code has the right hardcoded value
-        import inspect
-        source = inspect.getsource(enricher._call_tracking_api)
-        if "'brokerageKey': 'eshipping'" in source:
+        # but we can verify the precomputed request params
+        if enricher._tracking_params.get('brokerageKey') == 'eshipping':
             print("✓ brokerageKey correctly set to 'eshipping'")
         else:
             print("✗ brokerageKey not set to 'eshipping'")
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Unit tests for TrackingAPIEnricher caching and concurrency, using a mocked HTTP session
+"""
+
+import json
+import os
+import sys
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from enrichment import tracking_api
+from enrichment.tracking_api import TrackingAPIEnricher
+
+PLACEHOLDERS = {'tracking_status': None, 'tracking_location': None, 'tracking_date': None}
+
+# Minimal streamlit stand-in exposing only the tracking_api secrets section
+MOCK_STREAMLIT = SimpleNamespace(
+    secrets=SimpleNamespace(tracking_api=SimpleNamespace(bearer_token='test-token'))
+)
+
+
+def tracking_response(status_code, status='In Transit'):
+    """Build a mocked tracking API response."""
+    body = {'result': {'status': status, 'city': 'Dallas', 'state': 'TX'}} if status_code == 200 else {}
+    return mock.Mock(status_code=status_code, content=json.dumps(body).encode(), text='')
+
+
+def pro_from_url(url):
+    """PRO number is the last path segment of the tracking URL."""
+    return url.rsplit('/', 1)[1]
+
+
+class TrackingEnricherTestCase(unittest.TestCase):
+    """Builds enrichers whose session is a mock and whose config probe is skipped."""
+
+    def setUp(self):
+        patcher = mock.patch.dict(sys.modules, {'streamlit': MOCK_STREAMLIT})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        tracking_api._resolve_auth_header.cache_clear()
+        self.addCleanup(tracking_api._resolve_auth_header.cache_clear)
+
+    def make_enricher(self, get, **config):
+        enricher = TrackingAPIEnricher({'brokerage_key': 'test-brokerage', **config})
+        enricher.session = mock.Mock()
+        enricher.session.get.side_effect = get
+        enricher._config_validated = True
+        return enricher
+
+
+class CircuitBreakerTest(TrackingEnricherTestCase):
+
+    def test_concurrent_failures_are_all_counted(self):
+        enricher = self.make_enricher(None, circuit_breaker_threshold=10 ** 9)
+
+        def record_failures():
+            for _ in range(2000):
+                enricher._record_failure()
+
+        threads = [threading.Thread(target=record_failures) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(enricher._cb_failures, 16000)
+
+    def test_breaker_opens_at_threshold_and_fails_fast(self):
+        enricher = self.make_enricher(lambda url, **kwargs: tracking_response(500), circuit_breaker_threshold=3)
+
+        for pro_number in ('P1', 'P2', 'P3'):
+            self.assertIsNone(enricher._call_tracking_api(pro_number, 'ESTES'))
+        self.assertTrue(enricher._circuit_open())
+
+        self.assertIsNone(enricher._call_tracking_api('P4', 'ESTES'))
+        self.assertEqual(enricher.session.get.call_count, 3)
+
+    def test_success_resets_failure_count(self):
+        responses = {'BAD': 500, 'GOOD': 200}
+        enricher = self.make_enricher(
+            lambda url, **kwargs: tracking_response(responses[pro_from_url(url)[:-1]]),
+            circuit_breaker_threshold=3
+        )
+
+        for pro_number in ('BAD1', 'BAD2', 'GOOD1', 'BAD3', 'BAD4'):
+            enricher._call_tracking_api(pro_number, 'ESTES')
+
+        self.assertFalse(enricher._circuit_open())
+        self.assertEqual(enricher._cb_failures, 2)
+
+
+class TrackingCacheBoundTest(TrackingEnricherTestCase):
+
+    def test_cache_evicts_least_recently_used_entry(self):
+        enricher = self.make_enricher(lambda url, **kwargs: tracking_response(200), tracking_cache_max=2)
+
+        enricher._call_tracking_api('P1', 'ESTES')
+        enricher._call_tracking_api('P2', 'ESTES')
+        enricher._call_tracking_api('P1', 'ESTES')  # P1 becomes most recently used
+        enricher._call_tracking_api('P3', 'ESTES')
+
+        self.assertEqual(list(enricher._tracking_cache), [('ESTES', 'P1'), ('ESTES', 'P3')])
+        self.assertEqual(enricher.session.get.call_count, 3)
+
+        # The evicted pair is fetched again
+        enricher._call_tracking_api('P2', 'ESTES')
+        self.assertEqual(enricher.session.get.call_count, 4)
+        self.assertEqual(len(enricher._tracking_cache), 2)
+
+    def test_negative_entries_do_not_evict_hits(self):
+        statuses = {'HIT': 200, 'MISS': 404}
+        enricher = self.make_enricher(
+            lambda url, **kwargs: tracking_response(statuses[pro_from_url(url).rstrip('0123456789')]),
+            tracking_cache_max=2
+        )
+
+        enricher._call_tracking_api('HIT1', 'ESTES')
+        for index in range(5):
+            enricher._call_tracking_api(f'MISS{index}', 'ESTES')
+
+        self.assertIn(('ESTES', 'HIT1'), enricher._tracking_cache)
+        self.assertLessEqual(len(enricher._negative_cache), 2)
+
+
+class EnrichBatchTest(TrackingEnricherTestCase):
+
+    def test_rows_keep_order_and_share_one_call_per_pair(self):
+        enricher = self.make_enricher(
+            lambda url, **kwargs: tracking_response(200, status=f'Status {pro_from_url(url)}')
+        )
+        rows = [
+            {'PRO': 'P1', 'carrier': 'estes'},
+            {'PRO': 'P2', 'carrier': 'ESTES'},
+            {'PRO': 'P1', 'carrier': 'ESTES'},
+            {'load_number': 'NO-PRO'},
+        ]
+
+        enriched = enricher.enrich_batch(rows)
+
+        self.assertEqual([row.get('tracking_status') for row in enriched], ['Status P1', 'Status P2', 'Status P1', None])
+        self.assertEqual(enriched[3], {'load_number': 'NO-PRO', **PLACEHOLDERS})
+        self.assertEqual(sorted(pro_from_url(call.args[0]) for call in enricher.session.get.call_args_list), ['P1', 'P2'])
+
+    def test_lookups_run_concurrently(self):
+        # Each call waits until three are in flight at once; serial calls would break the barrier
+        barrier = threading.Barrier(3, timeout=5)
+
+        def get(url, **kwargs):
+            barrier.wait()
+            return tracking_response(200)
+
+        enricher = self.make_enricher(get)
+        rows = [{'PRO': pro_number, 'carrier': 'ESTES'} for pro_number in ('P1', 'P2', 'P3')]
+
+        enriched = enricher.enrich_batch(rows, max_workers=3)
+
+        self.assertEqual([row['tracking_status'] for row in enriched], ['In Transit'] * 3)
+
+    def test_rows_without_key_get_placeholders_like_enrich(self):
+        enricher = self.make_enricher(lambda url, **kwargs: tracking_response(404))
+        rows = [{'load_number': 'NO-PRO'}, {'PRO': 'P1'}, {'PRO': 'P2', 'carrier': 'ESTES'}]
+
+        enriched = enricher.enrich_batch(rows)
+
+        self.assertEqual(enriched, [enricher.enrich(row) for row in rows])
+        self.assertEqual(enriched[0], {'load_number': 'NO-PRO', **PLACEHOLDERS})
+        self.assertEqual(enriched[1], {'PRO': 'P1', **PLACEHOLDERS})
+
+    def test_rows_without_key_are_unchanged_when_placeholders_disabled(self):
+        enricher = self.make_enricher(lambda url, **kwargs: tracking_response(200), add_tracking_placeholders=False)
+        row = {'load_number': 'NO-PRO'}
+
+        self.assertIs(enricher.enrich(row), row)
+        self.assertIs(enricher.enrich_batch([row])[0], row)
+
+    def test_invalid_config_returns_rows_unchanged(self):
+        enricher = self.make_enricher(lambda url, **kwargs: tracking_response(200))
+        enricher._config_validated = False
+        rows = [{'PRO': 'P1', 'carrier': 'ESTES'}]
+
+        self.assertEqual(enricher.enrich_batch(rows), rows)
+        enricher.session.get.assert_not_called()
+
+
+class NegativeCacheTtlTest(TrackingEnricherTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.now = 1_000_000.0
+        patcher = mock.patch.object(tracking_api, 'time', SimpleNamespace(time=lambda: self.now))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_not_found_is_cached_until_ttl_expires(self):
+        enricher = self.make_enricher(lambda url, **kwargs: tracking_response(404))
+
+        self.assertIsNone(enricher._call_tracking_api('P1', 'ESTES'))
+        self.now += TrackingAPIEnricher.NOT_FOUND_CACHE_TTL
+        self.assertIsNone(enricher._call_tracking_api('P1', 'ESTES'))
+        self.assertEqual(enricher.session.get.call_count, 1)
+
+        self.now += 1
+        enricher._call_tracking_api('P1', 'ESTES')
+        self.assertEqual(enricher.session.get.call_count, 2)
+
+    def test_errors_use_the_shorter_ttl(self):
+        enricher = self.make_enricher(lambda url, **kwargs: tracking_response(500))
+
+        enricher._call_tracking_api('P1', 'ESTES')
+        self.now += TrackingAPIEnricher.ERROR_CACHE_TTL + 1
+        enricher._call_tracking_api('P1', 'ESTES')
+
+        self.assertEqual(enricher.session.get.call_count, 2)
+
+    def test_expired_miss_is_replaced_by_a_hit(self):
+        responses = iter([tracking_response(404), tracking_response(200)])
+        enricher = self.make_enricher(lambda url, **kwargs: next(responses))
+
+        enricher._call_tracking_api('P1', 'ESTES')
+        self.now += TrackingAPIEnricher.NOT_FOUND_CACHE_TTL + 1
+
+        self.assertEqual(enricher._call_tracking_api('P1', 'ESTES')['tracking_status'], 'In Transit')
+        self.assertNotIn(('ESTES', 'P1'), enricher._negative_cache)
+        self.assertIn(('ESTES', 'P1'), enricher._tracking_cache)
+
+
+class InflightDedupTest(TrackingEnricherTestCase):
+
+    def test_concurrent_callers_share_one_request(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def get(url, **kwargs):
+            started.set()
+            release.wait(5)
+            return tracking_response(200)
+
+        enricher = self.make_enricher(get)
+        results = {}
+
+        owner = threading.Thread(target=lambda: results.update(owner=enricher._call_tracking_api('P1', 'ESTES')))
+        owner.start()
+        self.assertTrue(started.wait(5))
+
+        # Signal once the second caller is blocked on the owner's Future
+        future = enricher._inflight[('ESTES', 'P1')]
+        waiting = threading.Event()
+        original_result = future.result
+
+        def result(*args, **kwargs):
+            waiting.set()
+            return original_result(*args, **kwargs)
+
+        future.result = result
+        waiter = threading.Thread(target=lambda: results.update(waiter=enricher._call_tracking_api('P1', 'ESTES')))
+        waiter.start()
+        self.assertTrue(waiting.wait(5))
+
+        release.set()
+        owner.join(5)
+        waiter.join(5)
+
+        self.assertEqual(enricher.session.get.call_count, 1)
+        self.assertEqual(results['owner'], results['waiter'])
+        self.assertEqual(results['waiter']['tracking_status'], 'In Transit')
+        self.assertEqual(enricher._inflight, {})
+
+    def test_inflight_entry_is_cleared_after_failure(self):
+        enricher = self.make_enricher(lambda url, **kwargs: tracking_response(500))
+
+        self.assertIsNone(enricher._call_tracking_api('P1', 'ESTES'))
+        self.assertIsNone(enricher._call_tracking_api('P1', 'ESTES'))
+
+        self.assertEqual(enricher.session.get.call_count, 1)
+        self.assertEqual(enricher._inflight, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -485,21 +485,21 @@ class EndToEndWorkflowProcessor:
                 if mapping.error_message:
                     enriched_row['load_id_error'] = mapping.error_message
             
-            # Apply enrichment using existing enrichment manager
-            # The Snowflake enrichment will use internal_load_id if available
-            pre_columns = set(enriched_row.keys())
-            enriched_row = self.enrichment_manager.enrich_row(enriched_row)
-            post_columns = set(enriched_row.keys())
-            new_columns = post_columns - pre_columns
-            
+            enriched_data.append(enriched_row)
+        
+        # Apply enrichment using existing enrichment manager in one batch so
+        # tracking API lookups run concurrently.
+        # The Snowflake enrichment will use internal_load_id if available
+        enriched_rows = self.enrichment_manager.enrich_rows(enriched_data)
+        
+        for i, (row, enriched_row) in enumerate(zip(enriched_data, enriched_rows)):
+            new_columns = set(enriched_row.keys()) - set(row.keys())
             if new_columns:
                 logger.info(f"Row {i}: Enrichment added columns: {new_columns}")
             else:
-                logger.debug(f"Row {i}: No new columns added by enrichment")
-            
-            enriched_data.append(enriched_row)
+                logger.debug("Row %d: No new columns added by enrichment", i)
         
-        return enriched_data
+        return enriched_rows
     
     def _generate_workflow_summary(self, results: WorkflowResults) -> Dict[str, Any]:
         """Generate summary statistics for the workflow."""